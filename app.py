@@ -10,11 +10,27 @@ import io
 from datetime import datetime
 import streamlit as st
 import pandas as pd
-from src.utils import load_all_data, get_available_countries, get_available_years, filter_data, calculate_kpis, get_change_icon, get_change_class
+from packaging.version import Version
+from src.utils import load_all_data, filter_data, selection_kpis, get_change_icons, get_change_classes, get_correlation_label, summary_stats, year_correlations, build_report, dataframe_to_table_rows, to_csv_bytes, to_json_bytes, to_xlsx_bytes, to_parquet_bytes
 from src.styles import get_css_styles
-from src.charts import create_gdp_chart, create_life_expectancy_chart, create_metric_card, create_gdp_bar_chart, create_population_bar_chart, create_bubble_chart, create_correlation_heatmap
+from src.charts import create_gdp_chart, create_life_expectancy_chart, create_metric_card_row, create_gdp_bar_chart, create_population_bar_chart, create_bubble_chart, create_correlation_heatmap
 from src.forecast import prepare_forecast_data, linear_regression_forecast, exponential_smoothing_forecast, create_forecast_chart
 
+# ReportLab is optional; without it the PDF report format is unavailable
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+    HAVE_REPORTLAB = True
+except ImportError:
+    HAVE_REPORTLAB = False
+
+# Copy-on-Write makes selections lazy views that copy only on write. It is
+# always on from pandas 3, where the option is deprecated, so only opt in before
+if Version(pd.__version__) < Version("3"):
+    pd.set_option('mode.copy_on_write', True)
+
 # Page configuration
 st.set_page_config(
     page_title="World Bank Indicators Dashboard",
@@ -26,8 +42,52 @@ st.set_page_config(
 # Apply CSS styles
 st.markdown(get_css_styles(), unsafe_allow_html=True)
 
+# Card titles for the KPIs returned by calculate_kpis, in display order
+KPI_TITLES = {
+    'median_gdp': "Median GDP per Capita",
+    'median_life_expectancy': "Median Life Expectancy",
+    'total_population': "Total Population",
+    'mean_income_growth': "Avg Income Growth"
+}
+
+# Paragraph and table styles for the PDF report, built once
+if HAVE_REPORTLAB:
+    PDF_STYLES = getSampleStyleSheet()
+    PDF_SUMMARY_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ])
+    PDF_PREVIEW_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), 6),
+    ])
+
+# Constant header for the KPI section on the overview page
+KPI_SECTION_HTML = """
+<div class="section-header">Key Performance Indicators</div>
+<div style="margin-bottom: 1.5rem; color: #718096; font-size: 0.95rem;">
+    These metrics represent aggregate values across all selected countries for the most recent year in your selection.
+</div>
+"""
+
 def main():
-    """Main application function."""
+    """Main application function.
+    
+    Each page is a fragment, so widgets inside a page rerun only that page;
+    sidebar and navigation changes still rerun the whole app.
+    """
     
     # Load data with caching
     data = load_all_data()
@@ -36,10 +96,9 @@ def main():
         st.error("Failed to load data. Please check the data files.")
         return
     
-    # Extract dataframes
-    main_data = data['main_data']
-    latest_snapshot = data['latest_snapshot']
-    world_aggregates = data['world_aggregates']
+    # Sidebar options come precomputed with the data; pages unpack what they need
+    available_countries = data['available_countries']
+    available_years = data['available_years']
     
     # Sidebar
     with st.sidebar:
@@ -53,8 +112,6 @@ def main():
         # Country selection
         st.markdown('<div class="filter-section">', unsafe_allow_html=True)
         st.markdown('<div class="filter-header">📍 Country Selection</div>', unsafe_allow_html=True)
-        available_countries = get_available_countries(main_data)
-        
         selected_countries = st.multiselect(
             "Select Countries",
             options=available_countries,
@@ -66,8 +123,7 @@ def main():
         # Year range selection with improved spacing
         st.markdown('<div class="filter-section" style="padding-bottom: 1.5rem;">', unsafe_allow_html=True)
         st.markdown('<div class="filter-header">📅 Year Range</div>', unsafe_allow_html=True)
-        available_years = get_available_years(main_data)
-        min_year, max_year = min(available_years), max(available_years)
+        min_year, max_year = available_years[0], available_years[-1]
         
         selected_years = st.slider(
             "Select Year Range",
@@ -114,83 +170,44 @@ def main():
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Display selected page
-    pages[selected_page](main_data, latest_snapshot, world_aggregates, selected_countries, selected_years)
+    pages[selected_page](data, selected_countries, selected_years)
 
-def overview_page(main_data, latest_snapshot, world_aggregates, selected_countries, selected_years):
+@st.fragment
+def overview_page(data, selected_countries, selected_years):
     """Overview page with KPIs and global trends."""
+    main_by_country_year = data['main_by_country_year']
+    
     st.markdown('<div class="section-header">📊 Overview</div>', unsafe_allow_html=True)
     
-    # Filter data based on selections
-    filtered_data = filter_data(main_data, selected_countries, selected_years)
+    # Filter data based on selections (sorted tuple keeps the caches hit-friendly)
+    selected_tuple = tuple(sorted(selected_countries))
+    filtered_data = filter_data(main_by_country_year, selected_tuple, tuple(selected_years), data['version'])
     
     # Calculate KPIs
-    current_year = max(selected_years)
-    previous_year = current_year - 1 if current_year > min(selected_years) else current_year
-    
-    kpis = calculate_kpis(filtered_data, current_year, previous_year)
-    
-    # KPI Cards
-    st.markdown('<div class="section-header">Key Performance Indicators</div>', unsafe_allow_html=True)
-    st.markdown("""
-    <div style="margin-bottom: 1.5rem; color: #718096; font-size: 0.95rem;">
-        These metrics represent aggregate values across all selected countries for the most recent year in your selection.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Create columns for KPI cards
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        # Median GDP per capita
-        kpi = kpis['median_gdp']
-        change_icon = get_change_icon(kpi['change'])
-        change_class = get_change_class(kpi['change'])
-        st.markdown(create_metric_card(
-            "Median GDP per Capita", 
-            kpi['formatted_value'], 
-            kpi['formatted_change'], 
-            change_icon, 
-            change_class
-        ), unsafe_allow_html=True)
-    
-    with col2:
-        # Median Life Expectancy
-        kpi = kpis['median_life_expectancy']
-        change_icon = get_change_icon(kpi['change'])
-        change_class = get_change_class(kpi['change'])
-        st.markdown(create_metric_card(
-            "Median Life Expectancy", 
-            kpi['formatted_value'], 
-            kpi['formatted_change'], 
-            change_icon, 
-            change_class
-        ), unsafe_allow_html=True)
-    
-    with col3:
-        # Total Population
-        kpi = kpis['total_population']
-        change_icon = get_change_icon(kpi['change'])
-        change_class = get_change_class(kpi['change'])
-        st.markdown(create_metric_card(
-            "Total Population", 
-            kpi['formatted_value'], 
-            kpi['formatted_change'], 
-            change_icon, 
-            change_class
-        ), unsafe_allow_html=True)
-    
-    with col4:
-        # Mean Income Growth
-        kpi = kpis['mean_income_growth']
-        change_icon = get_change_icon(kpi['change'])
-        change_class = get_change_class(kpi['change'])
-        st.markdown(create_metric_card(
-            "Avg Income Growth", 
-            kpi['formatted_value'], 
-            kpi['formatted_change'], 
-            change_icon, 
-            change_class
-        ), unsafe_allow_html=True)
+    first_year, current_year = selected_years
+    previous_year = current_year - 1 if current_year > first_year else current_year
+    
+    kpis = selection_kpis(main_by_country_year, data['latest_by_country'],
+                          selected_tuple, current_year, previous_year, data['version'])
+    
+    # KPI Cards - one markdown call for the whole row
+    st.markdown(KPI_SECTION_HTML, unsafe_allow_html=True)
+    
+    # Icons and classes for all cards in one vectorized pass
+    changes = [kpi['change'] for kpi in kpis.values()]
+    change_icons = get_change_icons(changes)
+    change_classes = get_change_classes(changes)
+    
+    st.markdown(create_metric_card_row([
+        {
+            'label': KPI_TITLES[key],
+            'value': kpi['formatted_value'],
+            'change': kpi['formatted_change'],
+            'change_icon': icon,
+            'change_class': change_class
+        }
+        for (key, kpi), icon, change_class in zip(kpis.items(), change_icons, change_classes)
+    ]), unsafe_allow_html=True)
     
     # Charts
     st.markdown('<div class="section-header">Global Trends</div>', unsafe_allow_html=True)
@@ -198,14 +215,14 @@ def overview_page(main_data, latest_snapshot, world_aggregates, selected_countri
     # GDP Chart
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.markdown('<div class="chart-title">GDP per Capita Over Time</div>', unsafe_allow_html=True)
-    gdp_chart = create_gdp_chart(filtered_data, selected_countries)
+    gdp_chart = create_gdp_chart(filtered_data, selected_tuple)
     st.plotly_chart(gdp_chart, width='stretch')
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Life Expectancy Chart
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.markdown('<div class="chart-title">Life Expectancy Over Time</div>', unsafe_allow_html=True)
-    life_chart = create_life_expectancy_chart(filtered_data, selected_countries)
+    life_chart = create_life_expectancy_chart(filtered_data, selected_tuple)
     st.plotly_chart(life_chart, width='stretch')
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -216,58 +233,51 @@ def overview_page(main_data, latest_snapshot, world_aggregates, selected_countri
         # Summary statistics
         st.subheader("Summary Statistics")
         
-        # Get only numeric columns for summary
-        numeric_cols = ['gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct']
-        summary = filtered_data[numeric_cols].describe().round(2)
+        # Summary of the indicator columns (shared cache with the report generator)
+        summary = summary_stats(filtered_data)
         
         st.dataframe(summary, width='stretch')
 
-def country_compare_page(main_data, latest_snapshot, world_aggregates, selected_countries, selected_years):
+@st.fragment
+def country_compare_page(data, selected_countries, selected_years):
     """Country comparison page."""
+    latest_snapshot = data['latest_snapshot']
+    latest_by_country = data['latest_by_country']
+    
     st.markdown('<div class="section-header">🇺🇳 Country Comparison</div>', unsafe_allow_html=True)
     
     if not selected_countries:
         st.warning("Please select at least one country from the sidebar to compare.")
         return
     
+    selected_tuple = tuple(sorted(selected_countries))
+    
     # Create two columns for the charts
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.markdown('<div class="chart-title">GDP per Capita Ranking</div>', unsafe_allow_html=True)
-        gdp_chart = create_gdp_bar_chart(latest_snapshot, selected_countries)
+        gdp_chart = create_gdp_bar_chart(latest_snapshot, selected_tuple)
         st.plotly_chart(gdp_chart, width='stretch')
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.markdown('<div class="chart-title">Population Ranking</div>', unsafe_allow_html=True)
-        pop_chart = create_population_bar_chart(latest_snapshot, selected_countries)
+        pop_chart = create_population_bar_chart(latest_snapshot, selected_tuple)
         st.plotly_chart(pop_chart, width='stretch')
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Comparison table
     st.markdown('<div class="section-header">Country Comparison Table</div>', unsafe_allow_html=True)
 
-    # Create a copy to avoid modifying the original dataframe
-    comparison_data = latest_snapshot[latest_snapshot['country'].isin(selected_countries)].copy()
-
-    # Calculate ranks if they don't exist
-    if 'gdp_rank' not in comparison_data.columns:
-        comparison_data['gdp_rank'] = comparison_data['gdp_pc_usd'].rank(ascending=False, method='min').astype(int)
-    if 'population_rank' not in comparison_data.columns:
-        comparison_data['population_rank'] = comparison_data['population_total'].rank(ascending=False, method='min').astype(int)
-
-    # Prepare table data
-    table_data = comparison_data[['country', 'gdp_pc_usd', 'gdp_rank', 'life_expectancy_years', 
-                                'population_total', 'population_rank', 'ann_income_pc_growth_pct']].copy()
-
-    # Format numbers for display
-    table_data['gdp_pc_usd'] = table_data['gdp_pc_usd'].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else "N/A")
-    table_data['population_total'] = table_data['population_total'].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "N/A")
-    table_data['ann_income_pc_growth_pct'] = table_data['ann_income_pc_growth_pct'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else "N/A")
-    table_data['life_expectancy_years'] = table_data['life_expectancy_years'].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "N/A")
+    # Look up the selected countries and project the table columns in one reindex
+    table_data = latest_by_country.reindex(
+        index=selected_countries,
+        columns=['gdp_pc_usd', 'gdp_rank', 'life_expectancy_years',
+                 'population_total', 'population_rank', 'ann_income_pc_growth_pct']
+    ).rename_axis('country').reset_index()
 
     # Rename columns for display
     table_data = table_data.rename(columns={
@@ -280,81 +290,27 @@ def country_compare_page(main_data, latest_snapshot, world_aggregates, selected_
         'ann_income_pc_growth_pct': 'Income Growth'
     })
 
-    # Display the table
+    # Display the table - values stay numeric and are formatted by the frontend
     st.dataframe(
         table_data,
         width='stretch',
         hide_index=True,
         column_config={
             "Country": st.column_config.TextColumn(width="medium"),
-            "GDP per Capita": st.column_config.TextColumn(width="small"),
+            "GDP per Capita": st.column_config.NumberColumn(width="small", format="dollar", default=None),
             "GDP Rank": st.column_config.NumberColumn(width="small"),
-            "Life Expectancy": st.column_config.TextColumn(width="small"),
-            "Population": st.column_config.TextColumn(width="medium"),
+            "Life Expectancy": st.column_config.NumberColumn(width="small", format="%.1f", default=None),
+            "Population": st.column_config.NumberColumn(width="medium", format="localized", default=None),
             "Population Rank": st.column_config.NumberColumn(width="small"),
-            "Income Growth": st.column_config.TextColumn(width="small")
+            "Income Growth": st.column_config.NumberColumn(width="small", format="%.1f%%", default=None)
         }
     )
 
-def relationships_page(main_data, latest_snapshot, world_aggregates, selected_countries, selected_years):
+@st.fragment
+def relationships_page(data, selected_countries, selected_years):
     """Relationships and correlations page."""
-    # Add inline CSS for the relationships page
-    st.markdown("""
-    <style>
-    .relationships-filter-section {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-bottom: 1.5rem;
-        border: 1px solid #e2e8f0;
-    }
-    
-    .relationships-filter-header {
-        font-weight: 600;
-        margin-bottom: 0.8rem;
-        color: #2d3748;
-        font-size: 1rem;
-    }
-    
-    .chart-subtitle {
-        font-size: 0.9rem;
-        color: #718096;
-        margin-bottom: 1rem;
-        font-style: italic;
-    }
-    
-    .insight-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 12px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1.5rem;
-        border-left: 4px solid #667eea;
-    }
-    
-    .insight-title {
-        font-size: 1.1rem;
-        font-weight: 600;
-        margin-bottom: 1rem;
-        color: #2d3748;
-    }
-    
-    .insight-content {
-        font-size: 0.95rem;
-        color: #4a5568;
-        line-height: 1.6;
-    }
-    
-    .insight-content ul {
-        margin: 0;
-        padding-left: 1.2rem;
-    }
-    
-    .insight-content li {
-        margin-bottom: 0.5rem;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    main_data = data['main_data']
+    main_by_country_year = data['main_by_country_year']
     
     st.markdown('<div class="section-header">🔗 Relationships & Correlations</div>', unsafe_allow_html=True)
     
@@ -362,15 +318,17 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
         st.warning("Please select at least one country from the sidebar to analyze relationships.")
         return
     
+    selected_tuple = tuple(sorted(selected_countries))
+    
     # Year selection for bubble chart with improved styling
     st.markdown('<div class="relationships-filter-section">', unsafe_allow_html=True)
     st.markdown('<div class="relationships-filter-header">📅 Select Year for Analysis</div>', unsafe_allow_html=True)
     
-    available_years = sorted(main_data['year'].unique())
+    available_years = data['available_years']
     selected_year = st.select_slider(
         "Select Year for Visualization",
         options=available_years,
-        value=max(available_years),
+        value=available_years[-1],
         help="Select the year to display in the visualizations"
     )
     st.markdown('</div>', unsafe_allow_html=True)
@@ -383,7 +341,7 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.markdown('<div class="chart-title">GDP vs Life Expectancy (Bubble Chart)</div>', unsafe_allow_html=True)
         st.markdown('<div class="chart-subtitle">Bubble size represents population, color represents income growth</div>', unsafe_allow_html=True)
-        bubble_chart = create_bubble_chart(main_data, selected_year, selected_countries)
+        bubble_chart = create_bubble_chart(main_data, selected_year, selected_tuple)
         st.plotly_chart(bubble_chart, width='stretch')
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -392,21 +350,20 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.markdown('<div class="chart-title">Indicator Correlations</div>', unsafe_allow_html=True)
         st.markdown('<div class="chart-subtitle">Relationship strength between metrics</div>', unsafe_allow_html=True)
-        heatmap = create_correlation_heatmap(main_data, selected_countries)
+        heatmap = create_correlation_heatmap(main_data, selected_tuple)
         st.plotly_chart(heatmap, width='stretch')
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Insights section
     st.markdown('<div class="section-header">📊 Data Insights</div>', unsafe_allow_html=True)
     
-    # Calculate some basic insights
-    filtered_data = main_data[(main_data['country'].isin(selected_countries)) & (main_data['year'] == selected_year)]
+    # Calculate all pairwise correlations for the selected year in a single pass
+    corr_matrix = year_correlations(main_by_country_year, selected_tuple, selected_year)
     
-    if not filtered_data.empty:
-        # Calculate correlations
-        gdp_life_corr = filtered_data['gdp_pc_usd'].corr(filtered_data['life_expectancy_years'])
-        income_gdp_corr = filtered_data['ann_income_pc_growth_pct'].corr(filtered_data['gdp_pc_usd'])
-        pop_gdp_corr = filtered_data['population_total'].corr(filtered_data['gdp_pc_usd'])
+    if corr_matrix is not None:
+        gdp_life_corr = corr_matrix.loc['gdp_pc_usd', 'life_expectancy_years']
+        income_gdp_corr = corr_matrix.loc['ann_income_pc_growth_pct', 'gdp_pc_usd']
+        pop_gdp_corr = corr_matrix.loc['population_total', 'gdp_pc_usd']
         
         # Display insights in a grid
         col1, col2, col3 = st.columns(3)
@@ -416,7 +373,7 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
             <div class="metric-card">
                 <div class="metric-label">GDP vs Life Expectancy</div>
                 <div class="metric-value">{gdp_life_corr:.2f}</div>
-                <div class="metric-change">{'Strong positive' if gdp_life_corr > 0.7 else 'Moderate positive' if gdp_life_corr > 0.3 else 'Weak positive' if gdp_life_corr > 0 else 'No relationship' if gdp_life_corr == 0 else 'Weak negative' if gdp_life_corr > -0.3 else 'Moderate negative' if gdp_life_corr > -0.7 else 'Strong negative'}</div>
+                <div class="metric-change">{get_correlation_label(gdp_life_corr)}</div>
             </div>
             """, unsafe_allow_html=True)
         
@@ -425,7 +382,7 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
             <div class="metric-card">
                 <div class="metric-label">Income Growth vs GDP</div>
                 <div class="metric-value">{income_gdp_corr:.2f}</div>
-                <div class="metric-change">{'Strong positive' if income_gdp_corr > 0.7 else 'Moderate positive' if income_gdp_corr > 0.3 else 'Weak positive' if income_gdp_corr > 0 else 'No relationship' if income_gdp_corr == 0 else 'Weak negative' if income_gdp_corr > -0.3 else 'Moderate negative' if income_gdp_corr > -0.7 else 'Strong negative'}</div>
+                <div class="metric-change">{get_correlation_label(income_gdp_corr)}</div>
             </div>
             """, unsafe_allow_html=True)
         
@@ -434,7 +391,7 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
             <div class="metric-card">
                 <div class="metric-label">Population vs GDP</div>
                 <div class="metric-value">{pop_gdp_corr:.2f}</div>
-                <div class="metric-change">{'Strong positive' if pop_gdp_corr > 0.7 else 'Moderate positive' if pop_gdp_corr > 0.3 else 'Weak positive' if pop_gdp_corr > 0 else 'No relationship' if pop_gdp_corr == 0 else 'Weak negative' if pop_gdp_corr > -0.3 else 'Moderate negative' if pop_gdp_corr > -0.7 else 'Strong negative'}</div>
+                <div class="metric-change">{get_correlation_label(pop_gdp_corr)}</div>
             </div>
             """, unsafe_allow_html=True)
     else:
@@ -459,8 +416,12 @@ def relationships_page(main_data, latest_snapshot, world_aggregates, selected_co
     </div>
     """, unsafe_allow_html=True)
 
-def forecast_page(main_data, latest_snapshot, world_aggregates, selected_countries, selected_years):
+@st.fragment
+def forecast_page(data, selected_countries, selected_years):
     """Forecasting page."""
+    by_country = data['by_country']
+    linear_trends = data['linear_trends']
+    
     st.markdown('<div class="section-header">🔮 Forecast</div>', unsafe_allow_html=True)
     
     # If no countries are selected, show a warning
@@ -507,7 +468,7 @@ def forecast_page(main_data, latest_snapshot, world_aggregates, selected_countri
     if st.button("Generate Forecast"):
         # Prepare data for forecasting
         indicator_code = indicators[selected_indicator]
-        ts_data = prepare_forecast_data(main_data, selected_country, indicator_code)
+        ts_data = prepare_forecast_data(by_country, selected_country, indicator_code)
         
         if ts_data is None:
             st.error("Not enough data available for forecasting this indicator for the selected country.")
@@ -515,7 +476,9 @@ def forecast_page(main_data, latest_snapshot, world_aggregates, selected_countri
         
         # Perform forecast based on selected method
         if forecast_method == "Linear Regression":
-            forecast_data = linear_regression_forecast(ts_data, forecast_years)
+            trends = linear_trends[indicator_code]
+            trend = tuple(trends.loc[selected_country]) if selected_country in trends.index else None
+            forecast_data = linear_regression_forecast(ts_data, forecast_years, trend)
         else:
             forecast_data = exponential_smoothing_forecast(ts_data, forecast_years)
         
@@ -560,26 +523,26 @@ def forecast_page(main_data, latest_snapshot, world_aggregates, selected_countri
         
         # Show forecast data table
         with st.expander("View Forecast Data", expanded=False):
-            # Format values based on indicator type
-            display_data = forecast_data.copy()
-            if indicator_code == 'gdp_pc_usd':
-                display_data['value'] = display_data['value'].apply(lambda x: f"${x:,.0f}")
-            else:
-                display_data['value'] = display_data['value'].apply(lambda x: f"{x:,.1f}")
+            # Pick the value format once; the frontend formats the numeric column
+            value_formats = {'gdp_pc_usd': 'dollar', 'population_total': 'localized'}
+            value_format = value_formats.get(indicator_code, '%.1f')
             
             st.dataframe(
-                display_data,
+                forecast_data,
                 width='stretch',
                 hide_index=True,
                 column_config={
                     "year": st.column_config.NumberColumn("Year"),
-                    "value": st.column_config.TextColumn("Value"),
+                    "value": st.column_config.NumberColumn("Value", format=value_format),
                     "type": st.column_config.TextColumn("Type")
                 }
             )
 
-def data_page(main_data, latest_snapshot, world_aggregates, selected_countries, selected_years):
+@st.fragment
+def data_page(data, selected_countries, selected_years):
     """Data exploration and download page."""
+    main_by_country_year = data['main_by_country_year']
+    
     st.markdown('<div class="section-header">💾 Data & Download</div>', unsafe_allow_html=True)
     
     # Create tabs for different functionalities
@@ -616,7 +579,7 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
             )
         
         # Filter data based on selections
-        filtered_data = filter_data(main_data, selected_countries, selected_years)
+        filtered_data = filter_data(main_by_country_year, tuple(sorted(selected_countries)), tuple(selected_years), data['version'])
         
         if not indicators:
             st.warning("Please select at least one indicator to display.")
@@ -629,11 +592,18 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
         display_data = display_data.sort_values(sort_by, ascending=ascending)
         
         # Display the data table - FIXED: use width='stretch' instead of use_container_width=True
+        # Number formats are applied at render time, so the columns stay numeric and sortable
         st.dataframe(
             display_data,
             width='stretch',  # Changed from use_container_width=True
             height=400,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                "gdp_pc_usd": st.column_config.NumberColumn(format="dollar"),
+                "life_expectancy_years": st.column_config.NumberColumn(format="%.1f"),
+                "population_total": st.column_config.NumberColumn(format="localized"),
+                "ann_income_pc_growth_pct": st.column_config.NumberColumn(format="%.1f"),
+            }
         )
         
         # Show data summary
@@ -655,7 +625,7 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
         
         # CSV Export
         st.markdown("#### CSV Export")
-        csv_data = filtered_data.to_csv(index=False)
+        csv_data = to_csv_bytes(filtered_data)
         
         st.download_button(
             label="Download CSV",
@@ -667,7 +637,7 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
         
         # JSON Export
         st.markdown("#### JSON Export")
-        json_data = filtered_data.to_json(orient="records", indent=2)
+        json_data = to_json_bytes(filtered_data)
         
         st.download_button(
             label="Download JSON",
@@ -677,24 +647,37 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
             help="Download the filtered data as a JSON file"
         )
         
-        # Excel Export (requires openpyxl)
+        # Excel Export (requires xlsxwriter or openpyxl)
         st.markdown("#### Excel Export")
         
         try:
-            import io
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                filtered_data.to_excel(writer, sheet_name='WorldBank Data', index=False)
+            xlsx_data = to_xlsx_bytes(filtered_data)
             
             st.download_button(
                 label="Download Excel",
-                data=buffer.getvalue(),
+                data=xlsx_data,
                 file_name="worldbank_data.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 help="Download the filtered data as an Excel file"
             )
         except ImportError:
-            st.info("Excel export requires the openpyxl package. Install it with: `pip install openpyxl`")
+            st.info("Excel export requires the xlsxwriter or openpyxl package. Install it with: `pip install xlsxwriter`")
+        
+        # Parquet Export (requires pyarrow)
+        st.markdown("#### Parquet Export")
+        
+        try:
+            parquet_data = to_parquet_bytes(filtered_data)
+            
+            st.download_button(
+                label="Download Parquet",
+                data=parquet_data,
+                file_name="worldbank_data.parquet",
+                mime="application/vnd.apache.parquet",
+                help="Download the filtered data as a Parquet file"
+            )
+        except ImportError:
+            st.info("Parquet export requires the pyarrow package. Install it with: `pip install pyarrow`")
     
     with tab3:
         st.markdown("### Generate Report")
@@ -716,65 +699,40 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
         # Generate report button - FIXED: This should be inside the tab3 block
         if st.button("Generate Report"):
             with st.spinner("Generating report..."):
-                # Create report content
-                report_content = f"""
-# {report_title}
-
-## Report Overview
-- Generated on: {pd.Timestamp.now().strftime("%Y-%m-%d %H:%M")}
-- Countries: {', '.join(selected_countries)}
-- Time period: {selected_years[0]} - {selected_years[1]}
-- Total records: {len(filtered_data)}
-
-## Summary Statistics
-"""
-                
-                # Add summary statistics
-                if include_summary:
-                    numeric_cols = ['gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct']
-                    summary = filtered_data[numeric_cols].describe().round(2)
-                    report_content += f"\n{summary.to_markdown()}\n"
-                
-                # Add raw data preview
-                if include_raw_data:
-                    report_content += "\n## Data Preview\n"
-                    report_content += f"\n{filtered_data.head(10).to_markdown(index=False)}\n"
+                # One timestamp per report, shared by both formats
+                generated_on = datetime.now().strftime("%Y-%m-%d %H:%M")
                 
                 # Create download button for the report
                 if report_format == "PDF":
-                    try:
-                        from reportlab.lib.pagesizes import letter
-                        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-                        from reportlab.lib.styles import getSampleStyleSheet
-                        from reportlab.lib import colors
-                        from reportlab.lib.units import inch
-                        
+                    if not HAVE_REPORTLAB:
+                        st.error("PDF generation requires the reportlab package. Install it with: `pip install reportlab`")
+                    else:
                         # Create a PDF buffer
                         buffer = io.BytesIO()
                         doc = SimpleDocTemplate(buffer, pagesize=letter)
-                        styles = getSampleStyleSheet()
                         story = []
                         
                         # Add title
-                        title = Paragraph(report_title, styles['Title'])
+                        title = Paragraph(report_title, PDF_STYLES['Title'])
                         story.append(title)
                         story.append(Spacer(1, 12))
                         
                         # Add report overview
                         overview_text = f"""
                         <b>Report Overview</b><br/>
-                        Generated on: {pd.Timestamp.now().strftime("%Y-%m-%d %H:%M")}<br/>
+                        Generated on: {generated_on}<br/>
                         Countries: {', '.join(selected_countries)}<br/>
                         Time period: {selected_years[0]} - {selected_years[1]}<br/>
                         Total records: {len(filtered_data)}
                         """
-                        overview = Paragraph(overview_text, styles['Normal'])
+                        overview = Paragraph(overview_text, PDF_STYLES['Normal'])
                         story.append(overview)
                         story.append(Spacer(1, 12))
                         
                         # Add summary statistics
                         if include_summary:
-                            summary_header = Paragraph("<b>Summary Statistics</b>", styles['Heading2'])
+                            summary = summary_stats(filtered_data)
+                            summary_header = Paragraph("<b>Summary Statistics</b>", PDF_STYLES['Heading2'])
                             story.append(summary_header)
                             
                             # Convert summary to a table
@@ -783,41 +741,20 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
                                 summary_data.append([idx] + list(summary.loc[idx]))
                             
                             summary_table = Table(summary_data)
-                            summary_table.setStyle(TableStyle([
-                                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                            ]))
+                            summary_table.setStyle(PDF_SUMMARY_TABLE_STYLE)
                             story.append(summary_table)
                             story.append(Spacer(1, 12))
                         
                         # Add raw data preview
                         if include_raw_data:
-                            data_header = Paragraph("<b>Data Preview</b>", styles['Heading2'])
+                            data_header = Paragraph("<b>Data Preview</b>", PDF_STYLES['Heading2'])
                             story.append(data_header)
                             
-                            # Convert data preview to a table
-                            preview_data = [list(filtered_data.head(10).columns)]
-                            for _, row in filtered_data.head(10).iterrows():
-                                preview_data.append(list(row))
-                            
-                            preview_table = Table(preview_data)
-                            preview_table.setStyle(TableStyle([
-                                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                                ('FONTSIZE', (0, 1), (-1, -1), 6),
-                            ]))
+                            # Pre-stringified rows; LongTable lays them out row by row
+                            preview_table = LongTable(dataframe_to_table_rows(filtered_data.head(10)), repeatRows=1, splitByRow=1)
+                            preview_table.setStyle(PDF_PREVIEW_TABLE_STYLE)
                             story.append(preview_table)
+                            story.append(Spacer(1, 12))
                         
                         # Build PDF
                         doc.build(story)
@@ -830,11 +767,18 @@ def data_page(main_data, latest_snapshot, world_aggregates, selected_countries,
                             mime="application/pdf",
                             help="Download the report as a PDF file"
                         )
-                        
-                    except ImportError:
-                        st.error("PDF generation requires the reportlab package. Install it with: `pip install reportlab`")
                 else:
-                    # HTML report
+                    # HTML report - sections built lazily and cached per selection and options
+                    report_content = build_report(
+                        main_by_country_year,
+                        tuple(sorted(selected_countries)),
+                        tuple(selected_years),
+                        include_summary,
+                        include_raw_data,
+                        report_title,
+                        generated_on,
+                        data['version']
+                    )
                     st.download_button(
                         label="Download HTML Report",
                         data=report_content,
@@ -0,0 +1,57 @@
+"""
+Build src/country_map.py, the static World Bank name -> ISO3 map used by
+standardize_country_codes.
+
+Usage: python scripts/build_country_map.py [raw_csv ...]
+"""
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT, 'src'))
+
+import pandas as pd
+from data_loader import lookup_iso3_code
+
+OUTPUT_PATH = os.path.join(ROOT, 'src', 'country_map.py')
+
+def build_country_map(file_paths):
+    """
+    Resolve every country in the given raw World Bank CSVs to its ISO3 code.
+    """
+    countries = pd.concat(
+        [pd.read_csv(path, usecols=['Country Name', 'Country Code']) for path in file_paths]
+    ).dropna().drop_duplicates('Country Name')
+    
+    mapping = {}
+    for name, code in countries.itertuples(index=False):
+        iso3 = lookup_iso3_code(name, code)
+        if iso3:
+            mapping[name] = iso3
+    
+    return dict(sorted(mapping.items()))
+
+def write_country_map(mapping, output_path=OUTPUT_PATH):
+    """
+    Write the mapping as a Python literal module.
+    """
+    lines = [
+        '"""',
+        'Static World Bank country name -> ISO3 code map.',
+        '',
+        'Generated by scripts/build_country_map.py; do not edit by hand.',
+        '"""',
+        '',
+        'WB_TO_ISO3 = {',
+    ]
+    lines.extend(f'    {name!r}: {code!r},' for name, code in mapping.items())
+    lines.append('}')
+    
+    with open(output_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+if __name__ == "__main__":
+    file_paths = sys.argv[1:] or [os.path.join(ROOT, 'data', 'path.csv')]
+    mapping = build_country_map(file_paths)
+    write_country_map(mapping)
+    print(f"Wrote {len(mapping)} countries to {OUTPUT_PATH}")
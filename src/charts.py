@@ -4,9 +4,84 @@ Chart creation functions using Plotly.
 
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
+import streamlit as st
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from src.utils import format_number_values, format_values
+
+# Shared chart styling, validated once at import; built on the default
+# "plotly" template so colourways and axis styling stay the same
+pio.templates['dashboard'] = pio.templates.merge_templates(
+    pio.templates['plotly'],
+    go.layout.Template(layout=dict(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(size=12, family='Arial')
+    ))
+)
+
+# Line charts with more points than this are downsampled before rendering
+LTTB_THRESHOLD = 2000
+LTTB_POINTS_PER_TRACE = 1000
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select point indices with Largest-Triangle-Three-Buckets downsampling.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    a = 0
+    
+    for i in range(n_out - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int(np.floor((i + 1) * every)) + 1
+        next_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = np.nanmean(x[next_start:next_end])
+        avg_y = np.nanmean(y[next_start:next_end])
+        
+        # Keep the point of the current bucket with the largest triangle area
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = a
+    
+    indices[-1] = n - 1
+    return indices
+
+def downsample_traces(fig: go.Figure, n_out: int = LTTB_POINTS_PER_TRACE) -> go.Figure:
+    """
+    Downsample every trace of a figure in place with LTTB.
+    """
+    for trace in fig.data:
+        if trace.x is None or len(trace.x) <= n_out:
+            continue
+        x = np.asarray(trace.x)
+        y = np.asarray(trace.y)
+        idx = lttb_indices(x, y, n_out)
+        trace.x = x[idx]
+        trace.y = y[idx]
+    
+    return fig
+
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def filter_countries(df: pd.DataFrame, selected_countries: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Filter rows for the selected countries (cached and shared across charts).
+    
+    Returns a new DataFrame, so callers may add columns to it.
+    """
+    return df[df['country'].isin(selected_countries)]
 
 def create_line_chart(df: pd.DataFrame, x_col: str, y_col: str, color_col: str, 
                      title: str, y_axis_title: str) -> go.Figure:
@@ -20,14 +95,17 @@ def create_line_chart(df: pd.DataFrame, x_col: str, y_col: str, color_col: str,
         color=color_col,
         title=title,
         labels={x_col: 'Year', y_col: y_axis_title, color_col: 'Country'},
-        color_discrete_sequence=px.colors.qualitative.Bold
+        color_discrete_sequence=px.colors.qualitative.Bold,
+        render_mode='webgl'
     )
     
+    # Send at most LTTB_POINTS_PER_TRACE points per country to the browser
+    if len(df) > LTTB_THRESHOLD:
+        downsample_traces(fig)
+    
     # Update layout for better appearance
     fig.update_layout(
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(size=12, family='Arial'),
+        template='dashboard',
         hovermode='x unified',
         legend=dict(
             orientation="h",
@@ -38,27 +116,26 @@ def create_line_chart(df: pd.DataFrame, x_col: str, y_col: str, color_col: str,
             title=None
         ),
         height=500,
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
-    
-    fig.update_xaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='lightgray',
-        showline=True, 
-        linewidth=1, 
-        linecolor='black',
-        tickmode='linear',
-        dtick=1
-    )
-    
-    fig.update_yaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='lightgray',
-        showline=True, 
-        linewidth=1, 
-        linecolor='black'
+        margin=dict(l=50, r=50, t=80, b=50),
+        # Axis styling folded into the same update so the layout is validated once
+        xaxis=dict(
+            showgrid=True, 
+            gridwidth=1, 
+            gridcolor='lightgray',
+            showline=True, 
+            linewidth=1, 
+            linecolor='black',
+            tickmode='linear',
+            dtick=1
+        ),
+        yaxis=dict(
+            showgrid=True, 
+            gridwidth=1, 
+            gridcolor='lightgray',
+            showline=True, 
+            linewidth=1, 
+            linecolor='black'
+        )
     )
     
     # Add a subtle annotation with data source
@@ -72,14 +149,15 @@ def create_line_chart(df: pd.DataFrame, x_col: str, y_col: str, color_col: str,
     
     return fig
 
-def create_gdp_chart(df: pd.DataFrame, selected_countries: List[str]) -> go.Figure:
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_gdp_chart(df: pd.DataFrame, selected_countries: Tuple[str, ...]) -> go.Figure:
     """
     Create GDP per capita line chart.
     """
     if not selected_countries:
         return go.Figure()
     
-    filtered_df = df[df['country'].isin(selected_countries)]
+    filtered_df = filter_countries(df, selected_countries)
     
     fig = create_line_chart(
         filtered_df,
@@ -95,14 +173,15 @@ def create_gdp_chart(df: pd.DataFrame, selected_countries: List[str]) -> go.Figu
     
     return fig
 
-def create_life_expectancy_chart(df: pd.DataFrame, selected_countries: List[str]) -> go.Figure:
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_life_expectancy_chart(df: pd.DataFrame, selected_countries: Tuple[str, ...]) -> go.Figure:
     """
     Create life expectancy line chart.
     """
     if not selected_countries:
         return go.Figure()
     
-    filtered_df = df[df['country'].isin(selected_countries)]
+    filtered_df = filter_countries(df, selected_countries)
     
     fig = create_line_chart(
         filtered_df,
@@ -129,273 +208,249 @@ def create_metric_card(label: str, value: str, change: str, change_icon: str, ch
     </div>
     """
 
-def create_gdp_bar_chart(latest_snapshot: pd.DataFrame, selected_countries: List[str]) -> go.Figure:
+def create_metric_card_row(cards: List[Dict]) -> str:
     """
-    Create a horizontal bar chart for GDP per capita ranking.
+    Create a single HTML grid row of metric cards.
+    
+    Each card is a dict with label, value, change, change_icon and change_class.
     """
-    # Create a copy to avoid modifying the original dataframe
-    df = latest_snapshot.copy()
+    cards_html = "".join(create_metric_card(**card).strip() for card in cards)
+    return f'<div class="kpi-row">{cards_html}</div>'
+
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_gdp_bar_chart(latest_snapshot: pd.DataFrame, selected_countries: Tuple[str, ...]) -> go.Figure:
+    """
+    Create a horizontal bar chart for GDP per capita ranking.
     
-    # Calculate GDP rank if it doesn't exist
-    if 'gdp_rank' not in df.columns:
-        df['gdp_rank'] = df['gdp_pc_usd'].rank(ascending=False, method='min').astype(int)
+    Expects the snapshot from load_all_data, with its precomputed gdp_rank.
+    """
+    # Filter data for selected countries (a new frame, safe to modify)
+    filtered_df = filter_countries(latest_snapshot, selected_countries)
     
-    # Filter data for selected countries and sort by GDP rank
-    filtered_df = df[df['country'].isin(selected_countries)]
-    filtered_df = filtered_df.sort_values('gdp_rank')
+    # Sort by GDP rank
+    filtered_df = filtered_df.iloc[np.argsort(filtered_df['gdp_rank'].to_numpy(dtype=float, na_value=np.nan), kind='stable')]
     
     # Format GDP values for display
-    filtered_df['gdp_formatted'] = filtered_df['gdp_pc_usd'].apply(
-        lambda x: f"${x:,.0f}" if pd.notna(x) else "N/A"
-    )
-    
-    fig = px.bar(
-        filtered_df,
-        y='country',
-        x='gdp_pc_usd',
-        orientation='h',
-        title='GDP per Capita Ranking',
-        labels={'gdp_pc_usd': 'GDP per Capita (Current US$)', 'country': 'Country'},
-        color='gdp_pc_usd',
-        color_continuous_scale='Viridis'
-    )
-    
-    # Update layout for better appearance
-    fig.update_layout(
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(size=12, family='Arial'),
-        height=max(400, len(selected_countries) * 50),  # Increased height for better spacing
-        yaxis={'categoryorder': 'total ascending'},
-        showlegend=False,
-        margin=dict(l=120, r=50, t=80, b=50),  # Increased left margin for country names
-        title_x=0.5,
-        title_font_size=16,
-        uniformtext_minsize=8,
-        uniformtext_mode='hide'
-    )
-    
-    # Format x-axis with dollar signs
-    fig.update_xaxes(
-        tickprefix='$', 
-        tickformat=',.0f',
-        title='GDP per Capita (Current US$)',
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        showline=True,
-        linewidth=1,
-        linecolor='black'
-    )
-    
-    fig.update_yaxes(
-        title='Country',
-        showline=True,
-        linewidth=1,
-        linecolor='black',
-        tickfont=dict(size=11)  # Smaller font for country names
-    )
-    
-    # Add value annotations with proper positioning
-    for i, row in enumerate(filtered_df.itertuples()):
-        fig.add_annotation(
-            x=row.gdp_pc_usd,
-            y=row.country,
-            text=f"${row.gdp_pc_usd:,.0f}",
-            showarrow=False,
-            xanchor='left',
-            xshift=10,
-            font=dict(size=10, color='black')
+    filtered_df['gdp_formatted'] = format_values(filtered_df['gdp_pc_usd'].to_numpy(), "${:,.0f}".format)
+    
+    # Trace, value labels and layout validated in a single Figure construction
+    # instead of a chain of update_* calls
+    gdp_values = filtered_df['gdp_pc_usd'].to_numpy()
+    fig = go.Figure(
+        go.Bar(
+            y=filtered_df['country'].astype(str).to_numpy(),
+            x=gdp_values,
+            orientation='h',
+            text=filtered_df['gdp_formatted'].to_numpy(),
+            textposition='outside',
+            cliponaxis=False,
+            textfont=dict(size=10, color='black'),
+            hovertemplate='<b>%{y}</b><br>GDP per Capita: %{text}<extra></extra>',
+            marker=dict(
+                color=gdp_values,
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title='GDP per Capita (Current US$)')
+            )
+        ),
+        layout=dict(
+            title=dict(text='GDP per Capita Ranking', x=0.5, font_size=16),
+            template='dashboard',
+            height=max(400, len(selected_countries) * 50),  # Increased height for better spacing
+            showlegend=False,
+            margin=dict(l=120, r=50, t=80, b=50),  # Increased left margin for country names
+            uniformtext_minsize=8,
+            uniformtext_mode='hide',
+            # Format x-axis with dollar signs
+            xaxis=dict(
+                tickprefix='$',
+                tickformat=',.0f',
+                title='GDP per Capita (Current US$)',
+                showgrid=True,
+                gridwidth=1,
+                gridcolor='lightgray',
+                showline=True,
+                linewidth=1,
+                linecolor='black'
+            ),
+            yaxis=dict(
+                categoryorder='total ascending',
+                title='Country',
+                showline=True,
+                linewidth=1,
+                linecolor='black',
+                tickfont=dict(size=11)  # Smaller font for country names
+            )
         )
+    )
     
     return fig
 
-def create_population_bar_chart(latest_snapshot: pd.DataFrame, selected_countries: List[str]) -> go.Figure:
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_population_bar_chart(latest_snapshot: pd.DataFrame, selected_countries: Tuple[str, ...]) -> go.Figure:
     """
     Create a horizontal bar chart for population ranking.
-    """
-    # Create a copy to avoid modifying the original dataframe
-    df = latest_snapshot.copy()
     
-    # Calculate population rank if it doesn't exist
-    if 'population_rank' not in df.columns:
-        df['population_rank'] = df['population_total'].rank(ascending=False, method='min').astype(int)
+    Expects the snapshot from load_all_data, with its precomputed population_rank.
+    """
+    # Filter data for selected countries (a new frame, safe to modify)
+    filtered_df = filter_countries(latest_snapshot, selected_countries)
     
-    # Filter data for selected countries and sort by population rank
-    filtered_df = df[df['country'].isin(selected_countries)]
-    filtered_df = filtered_df.sort_values('population_rank')
+    # Sort by population rank
+    filtered_df = filtered_df.iloc[np.argsort(filtered_df['population_rank'].to_numpy(dtype=float, na_value=np.nan), kind='stable')]
     
     # Format population values for display
-    from src.utils import format_number
-    filtered_df['population_formatted'] = filtered_df['population_total'].apply(
-        lambda x: format_number(x, 1) if pd.notna(x) else "N/A"
-    )
-    
-    fig = px.bar(
-        filtered_df,
-        y='country',
-        x='population_total',
-        orientation='h',
-        title='Population Ranking',
-        labels={'population_total': 'Population', 'country': 'Country'},
-        color='population_total',
-        color_continuous_scale='Plasma'
-    )
-    
-    # Update layout for better appearance
-    fig.update_layout(
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(size=12, family='Arial'),
-        height=max(400, len(selected_countries) * 50),
-        yaxis={'categoryorder': 'total ascending'},
-        showlegend=False,
-        margin=dict(l=120, r=50, t=80, b=50),
-        title_x=0.5,
-        title_font_size=16,
-        uniformtext_minsize=8,
-        uniformtext_mode='hide'
-    )
-    
-    # Format x-axis with vertical orientation
-    fig.update_xaxes(
-        tickformat=',.0f',
-        title='Population',
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        showline=True,
-        linewidth=1,
-        linecolor='black',
-        tickangle=-90,  # Rotate x-axis labels vertically
-        tickfont=dict(size=10)  # Smaller font for x-axis labels
-    )
-    
-    fig.update_yaxes(
-        title='Country',
-        showline=True,
-        linewidth=1,
-        linecolor='black',
-        tickfont=dict(size=11)
-    )
-    
-    # Add value annotations with proper positioning
-    for i, row in enumerate(filtered_df.itertuples()):
-        fig.add_annotation(
-            x=row.population_total,
-            y=row.country,
-            text=format_number(row.population_total, 1),
-            showarrow=False,
-            xanchor='left',
-            xshift=10,
-            font=dict(size=10, color='black')
+    filtered_df['population_formatted'] = format_number_values(filtered_df['population_total'].to_numpy(), 1)
+    
+    # Trace, value labels and layout validated in a single Figure construction
+    # instead of a chain of update_* calls
+    population_values = filtered_df['population_total'].to_numpy()
+    fig = go.Figure(
+        go.Bar(
+            y=filtered_df['country'].astype(str).to_numpy(),
+            x=population_values,
+            orientation='h',
+            text=filtered_df['population_formatted'].to_numpy(),
+            textposition='outside',
+            cliponaxis=False,
+            textfont=dict(size=10, color='black'),
+            hovertemplate='<b>%{y}</b><br>Population: %{text}<extra></extra>',
+            marker=dict(
+                color=population_values,
+                colorscale='Plasma',
+                showscale=True,
+                colorbar=dict(title='Population')
+            )
+        ),
+        layout=dict(
+            title=dict(text='Population Ranking', x=0.5, font_size=16),
+            template='dashboard',
+            height=max(400, len(selected_countries) * 50),
+            showlegend=False,
+            margin=dict(l=120, r=50, t=80, b=50),
+            uniformtext_minsize=8,
+            uniformtext_mode='hide',
+            # Format x-axis with vertical orientation
+            xaxis=dict(
+                tickformat=',.0f',
+                title='Population',
+                showgrid=True,
+                gridwidth=1,
+                gridcolor='lightgray',
+                showline=True,
+                linewidth=1,
+                linecolor='black',
+                tickangle=-90,  # Rotate x-axis labels vertically
+                tickfont=dict(size=10)  # Smaller font for x-axis labels
+            ),
+            yaxis=dict(
+                categoryorder='total ascending',
+                title='Country',
+                showline=True,
+                linewidth=1,
+                linecolor='black',
+                tickfont=dict(size=11)
+            )
         )
+    )
     
     return fig
 
-def create_bubble_chart(df: pd.DataFrame, selected_year: int, selected_countries: List[str]) -> go.Figure:
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_bubble_chart(df: pd.DataFrame, selected_year: int, selected_countries: Tuple[str, ...]) -> go.Figure:
     """
     Create a bubble scatter plot for GDP vs Life Expectancy.
     """
     # Filter data for selected year and countries
-    filtered_df = df[(df['year'] == selected_year) & (df['country'].isin(selected_countries))]
-    
-    # Remove rows with missing values
-    filtered_df = filtered_df.dropna(subset=['gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct'])
-    
-    # Format population for hover text
-    from src.utils import format_number
-    filtered_df['population_formatted'] = filtered_df['population_total'].apply(
-        lambda x: format_number(x, 1) if pd.notna(x) else "N/A"
-    )
-    
-    fig = px.scatter(
-        filtered_df,
-        x='gdp_pc_usd',
-        y='life_expectancy_years',
-        size='population_total',
-        color='ann_income_pc_growth_pct',
-        hover_name='country',
-        hover_data={
-            'gdp_pc_usd': ':.0f',
-            'life_expectancy_years': ':.1f',
-            'population_total': False,
-            'ann_income_pc_growth_pct': ':.1f',
-            'population_formatted': True
-        },
-        title='',
-        labels={
-            'gdp_pc_usd': 'GDP per Capita (Current US$)',
-            'life_expectancy_years': 'Life Expectancy (Years)',
-            'population_formatted': 'Population',
-            'ann_income_pc_growth_pct': 'Income Growth (%)'
-        },
-        color_continuous_scale='RdYlGn',
-        size_max=50
-    )
-    
-    # Update layout for better appearance
-    fig.update_layout(
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(size=12, family='Arial'),
-        height=500,
-        margin=dict(l=50, r=50, t=30, b=50),
-        title_x=0.5,
-        title_font_size=16,
-        coloraxis_colorbar=dict(
-            title="Income Growth (%)",
-            thickness=15,
-            len=0.75,
-            yanchor="middle",
-            y=0.5
+    filtered_df = filter_countries(df, selected_countries)
+    filtered_df = filtered_df[filtered_df['year'] == selected_year]
+    
+    # Pull the four plotted columns into one float array and drop incomplete rows
+    # with a numpy mask rather than a dropna copy of the whole frame
+    values = filtered_df[['gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct']].to_numpy(dtype=float)
+    mask = ~np.isnan(values).any(axis=1)
+    values = values[mask]
+    countries = filtered_df['country'].astype(str).to_numpy()[mask]
+    
+    # Population is the only hover field that needs preformatting
+    population_formatted = format_number_values(values[:, 2], 1)
+    
+    # WebGL scatter and layout validated in a single Figure construction;
+    # sizeref matches px.scatter's size_max=50 scaling
+    max_population = values[:, 2].max() if len(values) else 1.0
+    fig = go.Figure(
+        go.Scattergl(
+            x=values[:, 0],
+            y=values[:, 1],
+            mode='markers',
+            marker=dict(
+                size=values[:, 2],
+                sizemode='area',
+                sizeref=2.0 * max_population / (50 ** 2),
+                color=values[:, 3],
+                colorscale='RdYlGn',
+                showscale=True,
+                colorbar=dict(
+                    title="Income Growth (%)",
+                    thickness=15,
+                    len=0.75,
+                    yanchor="middle",
+                    y=0.5
+                )
+            ),
+            hovertext=countries,
+            customdata=population_formatted[:, None],
+            hovertemplate='<b>%{hovertext}</b><br>GDP: $%{x:,.0f}<br>Life Expectancy: %{y:.1f} years<br>Population: %{customdata[0]}<br>Income Growth: %{marker.color:.1f}%<extra></extra>'
+        ),
+        layout=dict(
+            template='dashboard',
+            height=500,
+            margin=dict(l=50, r=50, t=30, b=50),
+            title=dict(x=0.5, font_size=16),
+            # Format x-axis with dollar signs
+            xaxis=dict(
+                tickprefix='$',
+                tickformat=',.0f',
+                showgrid=True,
+                gridwidth=1,
+                gridcolor='lightgray',
+                showline=True,
+                linewidth=1,
+                linecolor='black',
+                title='GDP per Capita (Current US$)'
+            ),
+            yaxis=dict(
+                showgrid=True,
+                gridwidth=1,
+                gridcolor='lightgray',
+                showline=True,
+                linewidth=1,
+                linecolor='black',
+                title='Life Expectancy (Years)'
+            )
         )
     )
     
-    # Format x-axis with dollar signs
-    fig.update_xaxes(
-        tickprefix='$', 
-        tickformat=',.0f',
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        showline=True,
-        linewidth=1,
-        linecolor='black',
-        title='GDP per Capita (Current US$)'
-    )
-    
-    fig.update_yaxes(
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgray',
-        showline=True,
-        linewidth=1,
-        linecolor='black',
-        title='Life Expectancy (Years)'
-    )
-    
-    # Improve hover template
-    fig.update_traces(
-        hovertemplate='<b>%{hovertext}</b><br>GDP: $%{x:,.0f}<br>Life Expectancy: %{y:.1f} years<br>Population: %{customdata[0]}<br>Income Growth: %{marker.color:.1f}%<extra></extra>',
-        customdata=filtered_df['population_formatted'].values
-    )
-    
     return fig
 
-def create_correlation_heatmap(df: pd.DataFrame, selected_countries: List[str]) -> go.Figure:
+@st.cache_data(max_entries=64, ttl="15m", show_spinner=False)
+def create_correlation_heatmap(df: pd.DataFrame, selected_countries: Tuple[str, ...]) -> go.Figure:
     """
     Create a correlation heatmap across indicators.
     """
     # Filter data for selected countries
-    filtered_df = df[df['country'].isin(selected_countries)]
+    filtered_df = filter_countries(df, selected_countries)
     
     # Select only numeric columns for correlation
     numeric_cols = ['gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct']
     numeric_df = filtered_df[numeric_cols].dropna()
     
-    # Calculate correlation matrix
-    corr_matrix = numeric_df.corr()
+    # A correlation needs at least two observations
+    if len(numeric_df) < 2:
+        return go.Figure()
+    
+    # Calculate correlation matrix on the plain array (np.corrcoef works in float64)
+    corr_values = np.corrcoef(numeric_df.to_numpy(), rowvar=False)
     
     # Create custom labels with better formatting
     labels = {
@@ -404,10 +459,16 @@ def create_correlation_heatmap(df: pd.DataFrame, selected_countries: List[str])
         'population_total': 'Population',
         'ann_income_pc_growth_pct': 'Income Growth'
     }
+    tick_labels = [labels[col] for col in numeric_cols]
+    
+    # Cell text formatted in one vectorized call rather than per cell by Plotly
+    cell_text = np.char.mod('%.2f', corr_values)
     
     fig = px.imshow(
-        corr_matrix,
-        text_auto=True,
+        corr_values,
+        x=tick_labels,
+        y=tick_labels,
+        text_auto=False,
         aspect="auto",
         title='',
         color_continuous_scale='RdBu_r',
@@ -417,9 +478,7 @@ def create_correlation_heatmap(df: pd.DataFrame, selected_countries: List[str])
     
     # Update layout for better appearance with more space for labels
     fig.update_layout(
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(size=12, family='Arial'),
+        template='dashboard',
         height=550,  # Increased height to accommodate the title
         width=600,
         margin=dict(l=150, r=50, t=30, b=180),  # Increased bottom margin for the title
@@ -431,30 +490,23 @@ def create_correlation_heatmap(df: pd.DataFrame, selected_countries: List[str])
             len=0.6,
             yanchor="middle",
             y=0.5
+        ),
+        # Axis labels with better formatting, in the same validated update
+        xaxis=dict(
+            tickangle=90,  # Set to 90 for vertical orientation
+            tickfont=dict(size=12),
+            title_text=''
+        ),
+        yaxis=dict(
+            tickfont=dict(size=12),
+            title_text=''
         )
     )
     
-    # Update x and y axis labels with better formatting
-    fig.update_xaxes(
-        tickvals=list(range(len(numeric_cols))),
-        ticktext=[labels[col] for col in numeric_cols],
-        tickangle=90,  # Set to 90 for vertical orientation
-        tickfont=dict(size=12),
-        tickmode='array',
-        title_text=''
-    )
-    
-    fig.update_yaxes(
-        tickvals=list(range(len(numeric_cols))),
-        ticktext=[labels[col] for col in numeric_cols],
-        tickfont=dict(size=12),
-        tickmode='array',
-        title_text=''
-    )
-    
     # Improve the text display on the heatmap
     fig.update_traces(
-        texttemplate='%{text:.2f}',
+        text=cell_text,
+        texttemplate='%{text}',
         textfont=dict(size=12, color='black')
     )
     
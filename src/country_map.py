@@ -0,0 +1,21 @@
+"""
+Static World Bank country name -> ISO3 code map.
+
+Generated by scripts/build_country_map.py; do not edit by hand.
+"""
+
+WB_TO_ISO3 = {
+    'Australia': 'AUS',
+    'Canada': 'CAN',
+    'China': 'CHN',
+    'European Union': 'EUU',
+    'Finland': 'FIN',
+    'Germany': 'DEU',
+    'Italy': 'ITA',
+    'Korea, Rep.': 'KOR',
+    'Pakistan': 'PAK',
+    'Qatar': 'QAT',
+    'South Africa': 'ZAF',
+    'United Kingdom': 'GBR',
+    'United States': 'USA',
+}
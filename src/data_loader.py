@@ -1,69 +1,119 @@
+import hashlib
+import os
+import re
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict, Optional
-import pycountry
+from typing import Tuple, Dict, List, Optional
 import logging
+from country_map import WB_TO_ISO3
+
+# Polars is optional; without it the raw CSV is read and reshaped with pandas
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def standardize_country_codes(df: pd.DataFrame) -> pd.DataFrame:
+# World Bank series codes and the column names they are loaded as
+INDICATOR_MAPPING = {
+    'NY.ADJ.NNTY.PC.KD.ZG': 'ann_income_pc_growth_pct',
+    'SP.POP.TOTL': 'population_total', 
+    'SP.DYN.LE00.IN': 'life_expectancy_years',
+    'NY.GDP.PCAP.CD': 'gdp_pc_usd'
+}
+
+# Codes pycountry cannot resolve from World Bank names
+SPECIAL_COUNTRY_CODES = {
+    'European Union': 'EUU',  # EUU is the World Bank code for European Union
+    'Korea, Rep.': 'KOR',
+}
+
+# Four-digit year in a raw year column label, e.g. "2015 [YR2015]"
+YEAR_COLUMN_PATTERN = re.compile(r'(\d{4})')
+
+# Cleaned frames are cached in this directory, next to the raw CSV
+CACHE_DIR_NAME = '.cache'
+
+# Bump whenever the cleaned frame's columns or dtypes change, so stale caches miss
+CACHE_VERSION = 2
+
+def lookup_iso3_code(country_name: str, current_code: str) -> Optional[str]:
     """
-    Standardize country codes to ISO3 format using pycountry.
+    Resolve a country name (and its current code) to an ISO3 code with pycountry.
+    
+    This is the slow path behind WB_TO_ISO3, used for names the static map
+    does not know and by scripts/build_country_map.py to build it.
     
     Args:
-        df: DataFrame with country names and codes
+        country_name: Country name as written in the World Bank data
+        current_code: Code given alongside the name
         
     Returns:
-        DataFrame with standardized ISO3 codes
+        ISO3 code, or None if none could be found
     """
-    df_clean = df.copy()
+    import pycountry
     
-    # Create a mapping for special cases
-    special_mapping = {
-        'European Union': 'EUU',  # EUU is the World Bank code for European Union
-        'Korea, Rep.': 'KOR',
-    }
+    # First check special cases
+    if country_name in SPECIAL_COUNTRY_CODES:
+        return SPECIAL_COUNTRY_CODES[country_name]
     
-    def get_iso3_code(country_name: str, current_code: str) -> str:
-        # First check special cases
-        if country_name in special_mapping:
-            return special_mapping[country_name]
-        
-        # Try to find by current code first
-        if current_code and len(current_code) == 3:
-            try:
-                country = pycountry.countries.get(alpha_3=current_code)
-                if country:
-                    return current_code
-            except:
-                pass
-        
-        # Try to find by name
+    # Try to find by current code first
+    if current_code and len(current_code) == 3:
         try:
-            country = pycountry.countries.get(name=country_name)
+            country = pycountry.countries.get(alpha_3=current_code)
             if country:
-                return country.alpha_3
-        except:
-            pass
-        
-        # Try fuzzy matching by name
-        try:
-            country = pycountry.countries.search_fuzzy(country_name)
-            if country:
-                return country[0].alpha_3
+                return current_code
         except:
             pass
+    
+    # Try to find by name
+    try:
+        country = pycountry.countries.get(name=country_name)
+        if country:
+            return country.alpha_3
+    except:
+        pass
+    
+    # Try fuzzy matching by name
+    try:
+        country = pycountry.countries.search_fuzzy(country_name)
+        if country:
+            return country[0].alpha_3
+    except:
+        pass
+    
+    # If all else fails, return the original code
+    return current_code if current_code and len(current_code) == 3 else None
+
+def standardize_country_codes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Standardize country codes to ISO3 format.
+    
+    Known World Bank names come from the static WB_TO_ISO3 map; only other
+    names go through pycountry.
+    
+    Args:
+        df: DataFrame with country names and codes
         
-        # If all else fails, return the original code
-        return current_code if current_code and len(current_code) == 3 else None
+    Returns:
+        DataFrame with standardized ISO3 codes
+    """
+    df_clean = df.copy()
     
-    # Apply the standardization
-    df_clean['iso_code'] = df_clean.apply(
-        lambda row: get_iso3_code(row['country'], row['iso_code']), 
-        axis=1
-    )
+    # Resolve each unique country once, then map the result onto every row
+    names = df_clean['country'].dropna().unique()
+    mapping = {name: WB_TO_ISO3[name] for name in names if name in WB_TO_ISO3}
+    
+    unknown_names = [name for name in names if name not in mapping]
+    if unknown_names:
+        code_lookup = df_clean.drop_duplicates('country').set_index('country')['iso_code'].to_dict()
+        for name in unknown_names:
+            mapping[name] = lookup_iso3_code(name, code_lookup[name])
+    
+    df_clean['iso_code'] = df_clean['country'].map(mapping)
     
     # Log any countries that couldn't be standardized
     invalid_countries = df_clean[df_clean['iso_code'].isna()]['country'].unique()
@@ -72,6 +122,52 @@ def standardize_country_codes(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_clean
 
+def is_sorted_by_country_year(df: pd.DataFrame) -> bool:
+    """
+    Check whether rows are ordered by country, then year.
+    
+    Args:
+        df: DataFrame with country and year columns
+        
+    Returns:
+        True if the (country, year) pairs are non-decreasing
+    """
+    return pd.MultiIndex.from_frame(df[['country', 'year']]).is_monotonic_increasing
+
+def interpolate_within_groups(df: pd.DataFrame, columns: List[str], group_col: str,
+                              limit_direction: str = 'forward') -> pd.DataFrame:
+    """
+    Linearly interpolate columns within each group without a per-group callback.
+    
+    Equivalent to groupby(group_col)[columns].transform(lambda x: x.interpolate(
+    limit_direction=limit_direction)) for rows already sorted by group. Gaps
+    between two values of the same group come from one frame-wide
+    interpolation; gaps at the edges of a group are filled with the group's
+    nearest value, in the directions limit_direction allows.
+    
+    Args:
+        df: DataFrame sorted by group_col (and time within each group)
+        columns: Columns to interpolate
+        group_col: Column identifying the groups
+        limit_direction: 'forward' or 'both'
+        
+    Returns:
+        DataFrame of the interpolated columns, aligned with df
+    """
+    interior = df[columns].interpolate(limit_area='inside')
+    forward = df.groupby(group_col, sort=False)[columns].ffill()
+    backward = df.groupby(group_col, sort=False)[columns].bfill()
+    
+    # Positions with a known value on both sides in the same group
+    result = interior.where(forward.notna() & backward.notna())
+    
+    # Trailing gaps take the group's last value, as linear interpolation does
+    result = result.fillna(forward)
+    if limit_direction == 'both':
+        result = result.fillna(backward)
+    
+    return result
+
 def handle_missing_data(df: pd.DataFrame, strategy: str = 'forward_fill') -> pd.DataFrame:
     """
     Handle missing data with specified strategy.
@@ -83,31 +179,28 @@ def handle_missing_data(df: pd.DataFrame, strategy: str = 'forward_fill') -> pd.
     Returns:
         DataFrame with handled missing values
     """
-    df_clean = df.copy()
-    
-    # Sort by country and year for proper handling
-    df_clean = df_clean.sort_values(['country', 'year'])
+    # Sort by country and year for proper handling, unless the loader already did
+    if is_sorted_by_country_year(df):
+        df_clean = df.copy()
+    else:
+        df_clean = df.sort_values(['country', 'year'], kind='stable')
     
     # Define which columns to handle with which strategy
     time_series_columns = ['ann_income_pc_growth_pct', 'gdp_pc_usd', 'life_expectancy_years']
     demographic_columns = ['population_total']
     
-    # Group by country and apply missing data handling
-    grouped = df_clean.groupby('country')
-    
     if strategy == 'forward_fill':
-        # For time series data, forward fill within each country
-        for col in time_series_columns:
-            df_clean[col] = grouped[col].transform(lambda x: x.ffill().bfill())
+        # For time series data, forward fill then back fill within each country
+        forward = df_clean.groupby('country', sort=False)[time_series_columns].ffill()
+        df_clean[time_series_columns] = forward.groupby(df_clean['country'], sort=False).bfill()
         
         # For demographic data, use interpolation
-        for col in demographic_columns:
-            df_clean[col] = grouped[col].transform(lambda x: x.interpolate())
+        df_clean[demographic_columns] = interpolate_within_groups(df_clean, demographic_columns, 'country')
     
     elif strategy == 'interpolate':
         # Use linear interpolation for all numeric columns
-        for col in time_series_columns + demographic_columns:
-            df_clean[col] = grouped[col].transform(lambda x: x.interpolate(limit_direction='both'))
+        columns = time_series_columns + demographic_columns
+        df_clean[columns] = interpolate_within_groups(df_clean, columns, 'country', limit_direction='both')
     
     # For 'leave_gaps', we do nothing - leave missing values as is
     
@@ -123,39 +216,40 @@ def validate_data(df: pd.DataFrame) -> Tuple[bool, pd.DataFrame]:
     Returns:
         Tuple of (is_valid, validation_report)
     """
-    validation_checks = []
-    
-    # Check for missing ISO codes
-    missing_iso = df['iso_code'].isna().sum()
-    validation_checks.append({
-        'check': 'Missing ISO codes',
-        'count': missing_iso,
-        'status': 'PASS' if missing_iso == 0 else 'WARNING'
-    })
-    
-    # Check for negative population
-    negative_pop = (df['population_total'] < 0).sum()
-    validation_checks.append({
-        'check': 'Negative population values',
-        'count': negative_pop,
-        'status': 'PASS' if negative_pop == 0 else 'ERROR'
-    })
-    
-    # Check for unrealistic life expectancy
-    unrealistic_life = ((df['life_expectancy_years'] < 20) | (df['life_expectancy_years'] > 100)).sum()
-    validation_checks.append({
-        'check': 'Unrealistic life expectancy values',
-        'count': unrealistic_life,
-        'status': 'PASS' if unrealistic_life == 0 else 'ERROR'
-    })
-    
-    # Check for missing values after handling
-    missing_after = df.isnull().sum().sum()
-    validation_checks.append({
-        'check': 'Total missing values after handling',
-        'count': missing_after,
-        'status': 'PASS' if missing_after == 0 else 'WARNING'
-    })
+    # Pull the checked columns out as arrays once and count every check in one block
+    population = df['population_total'].to_numpy(dtype=float)
+    life_expectancy = df['life_expectancy_years'].to_numpy(dtype=float)
+    numeric_values = df.select_dtypes(include='number').to_numpy(dtype=float)
+    
+    with np.errstate(invalid='ignore'):
+        missing_iso = df['iso_code'].isna().to_numpy().sum()
+        negative_pop = (population < 0).sum()
+        unrealistic_life = ((life_expectancy < 20) | (life_expectancy > 100)).sum()
+        missing_after = (np.isnan(numeric_values).sum()
+                         + df.select_dtypes(exclude='number').isna().to_numpy().sum())
+    
+    validation_checks = [
+        {
+            'check': 'Missing ISO codes',
+            'count': missing_iso,
+            'status': 'PASS' if missing_iso == 0 else 'WARNING'
+        },
+        {
+            'check': 'Negative population values',
+            'count': negative_pop,
+            'status': 'PASS' if negative_pop == 0 else 'ERROR'
+        },
+        {
+            'check': 'Unrealistic life expectancy values',
+            'count': unrealistic_life,
+            'status': 'PASS' if unrealistic_life == 0 else 'ERROR'
+        },
+        {
+            'check': 'Total missing values after handling',
+            'count': missing_after,
+            'status': 'PASS' if missing_after == 0 else 'WARNING'
+        }
+    ]
     
     # Create validation report
     validation_report = pd.DataFrame(validation_checks)
@@ -163,19 +257,98 @@ def validate_data(df: pd.DataFrame) -> Tuple[bool, pd.DataFrame]:
     
     return is_valid, validation_report
 
-def load_and_transform_data(file_path: str, handle_missing: bool = True) -> Tuple[pd.DataFrame, Dict]:
+def read_year_columns(file_path: str) -> Dict[str, int]:
     """
-    Load and transform World Bank data from wide to long format.
+    Map each year column label of a raw CSV to its year.
     
     Args:
-        file_path: Path to the CSV file
-        handle_missing: Whether to handle missing data
+        file_path: Path to the raw CSV file
+        
+    Returns:
+        Dictionary of {column label: year}, e.g. {"2015 [YR2015]": 2015}
+    """
+    # Read only the header and parse the year once per label
+    header = pd.read_csv(file_path, nrows=0).columns
+    
+    year_columns = {}
+    for col in header:
+        match = YEAR_COLUMN_PATTERN.search(col)
+        if match:
+            year_columns[col] = int(match.group(1))
+    
+    return year_columns
+
+def read_indicator_table_polars(file_path: str, year_columns: Dict[str, int], series_codes) -> pd.DataFrame:
+    """
+    Polars version of read_indicator_table.
+    
+    Args:
+        file_path: Path to the raw CSV file
+        year_columns: Year column labels mapped to their years
+        series_codes: Series codes to keep
+        
+    Returns:
+        pandas DataFrame with Country Name, Country Code and year columns
+        plus one float column per series code
+    """
+    id_vars = ['Country Name', 'Country Code', 'Series Code']
+    
+    # Read only the id and year columns, and drop footer rows
+    df = (
+        pl.scan_csv(file_path, null_values=['..', '', 'NA'], infer_schema=False)
+        .select([*id_vars, *year_columns])
+        .filter(pl.col('Country Name').is_not_null() & (pl.col('Country Name') != ''))
+        .collect()
+    )
+    
+    # Drop year columns with no data at all, then the indicators we do not use
+    year_labels = [col for col in year_columns if df[col].null_count() < df.height]
+    df = df.filter(pl.col('Series Code').is_in(list(series_codes)))
+    
+    # Keep the first row of any repeated series so the pivot needs no aggregation
+    df = df.unique(subset=id_vars, keep='first', maintain_order=True)
+    
+    df_long = df.unpivot(index=id_vars, on=year_labels, variable_name='year_label', value_name='value').with_columns(
+        pl.col('year_label').replace_strict(year_columns, return_dtype=pl.Int64).alias('year'),
+        pl.col('value').cast(pl.Float64)
+    )
+    
+    # Get each indicator as a separate column, ordered like the pandas reshape
+    df_pivoted = df_long.pivot(on='Series Code', index=['Country Name', 'Country Code', 'year'], values='value')
+    series_columns = sorted(col for col in df_pivoted.columns if col not in ('Country Name', 'Country Code', 'year'))
+    df_pivoted = df_pivoted.select(['Country Name', 'Country Code', 'year', *series_columns])
+    
+    return df_pivoted.to_pandas()
+
+def read_indicator_table(file_path: str, series_codes) -> pd.DataFrame:
+    """
+    Read a raw World Bank CSV into one row per country and year, with one
+    column per series code.
+    
+    Uses Polars when installed and pandas otherwise.
+    
+    Args:
+        file_path: Path to the raw CSV file
+        series_codes: Series codes to keep
         
     Returns:
-        Tuple of (transformed DataFrame, indicator mapping dictionary)
+        DataFrame with Country Name, Country Code and year columns plus one
+        float column per series code
     """
-    # Load the raw data
-    df = pd.read_csv(file_path)
+    year_columns = read_year_columns(file_path)
+    
+    if pl is not None:
+        return read_indicator_table_polars(file_path, year_columns, series_codes)
+    
+    # Load only the id and year columns; '..' cells parse straight to NaN,
+    # so the year columns come out as floats
+    df = pd.read_csv(
+        file_path,
+        usecols=['Country Name', 'Country Code', 'Series Code', *year_columns],
+        dtype={'Series Code': 'category'},
+        na_values=['..', '', 'NA'],
+        engine='c'
+    )
     
     # Remove any empty rows and columns
     df = df.dropna(how='all').dropna(axis=1, how='all')
@@ -183,81 +356,127 @@ def load_and_transform_data(file_path: str, handle_missing: bool = True) -> Tupl
     # Remove footer rows (non-data rows at the end)
     df = df[df['Country Name'].notna() & (df['Country Name'] != '')]
     
-    # Identify year columns (those containing 'YR' or digits)
-    year_columns = [col for col in df.columns if any(x in col for x in ['YR', '19', '20'])]
+    # Filter only the indicators we care about, before any reshaping
+    df = df[df['Series Code'].isin(series_codes)]
     
-    # Melt the dataframe to convert from wide to long format
-    id_vars = ['Country Name', 'Country Code', 'Series Name', 'Series Code']
-    id_vars = [col for col in id_vars if col in df.columns]
+    # Keep the first row of any repeated series so the reshape needs no aggregation
+    df = df.drop_duplicates(['Country Name', 'Country Code', 'Series Code'], keep='first')
     
-    df_long = df.melt(
-        id_vars=id_vars,
-        value_vars=year_columns,
-        var_name='year_str',
-        value_name='value'
+    year_labels = [col for col in year_columns if col in df.columns]
+    years = np.array([year_columns[col] for col in year_labels], dtype=np.int64)
+    
+    # Integer positions of each input row's country and series in the output
+    country_codes, countries = pd.factorize(
+        pd.MultiIndex.from_arrays([df['Country Name'], df['Country Code']]), sort=True, use_na_sentinel=False
     )
+    series_codes_used, series_columns = pd.factorize(df['Series Code'].astype(str), sort=True)
+    
+    # One output row per (country, year), one column per series: scatter each
+    # input row's year values straight into place
+    n_years = len(years)
+    values = np.full((len(countries) * n_years, len(series_columns)), np.nan)
+    rows = country_codes[:, None] * n_years + np.arange(n_years)
+    values[rows, series_codes_used[:, None]] = df[year_labels].to_numpy(dtype=float)
     
-    # Extract year from the year string (e.g., "2015 [YR2015]" -> 2015)
-    df_long['year'] = df_long['year_str'].str.extract(r'(\d{4})').astype(int)
+    df_pivoted = pd.DataFrame(values, columns=pd.Index(series_columns, name='Series Code'))
+    df_pivoted.insert(0, 'Country Name', np.repeat(countries.get_level_values(0).to_numpy(), n_years))
+    df_pivoted.insert(1, 'Country Code', np.repeat(countries.get_level_values(1).to_numpy(), n_years))
+    df_pivoted.insert(2, 'year', np.tile(years, len(countries)))
     
-    # Drop the original year string column
-    df_long = df_long.drop(columns=['year_str'])
+    return df_pivoted
+
+def cleaned_cache_path(file_path: str, handle_missing: bool) -> str:
+    """
+    Path of the Parquet cache for a raw CSV and load options.
     
-    # Create indicator mapping
-    indicator_mapping = {
-        'NY.ADJ.NNTY.PC.KD.ZG': 'ann_income_pc_growth_pct',
-        'SP.POP.TOTL': 'population_total', 
-        'SP.DYN.LE00.IN': 'life_expectancy_years',
-        'NY.GDP.PCAP.CD': 'gdp_pc_usd'
-    }
+    The name hashes the cache version, the file's mtime and size, the
+    indicator mapping and handle_missing, so editing the CSV or the options
+    misses the cache.
     
-    # Filter only the indicators we care about
-    df_long = df_long[df_long['Series Code'].isin(indicator_mapping.keys())]
+    Args:
+        file_path: Path to the raw CSV file
+        handle_missing: Whether missing data is handled
+        
+    Returns:
+        Path of the cache file (which may not exist yet)
+    """
+    stat = os.stat(file_path)
+    key = hashlib.sha1(
+        f"{CACHE_VERSION}:{stat.st_mtime_ns}:{stat.st_size}:{sorted(INDICATOR_MAPPING.items())}:{handle_missing}".encode()
+    ).hexdigest()
+    return os.path.join(os.path.dirname(file_path), CACHE_DIR_NAME, f'{key}.parquet')
+
+def load_and_transform_data(file_path: str, handle_missing: bool = True,
+                            use_cache: bool = True) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Load and transform World Bank data from wide to long format.
     
-    # Pivot to get each indicator as a separate column
-    df_pivoted = df_long.pivot_table(
-        index=['Country Name', 'Country Code', 'year'],
-        columns='Series Code',
-        values='value',
-        aggfunc='first'
-    ).reset_index()
+    Args:
+        file_path: Path to the CSV file
+        handle_missing: Whether to handle missing data
+        use_cache: Whether to read and write the Parquet cache of the result
+        
+    Returns:
+        Tuple of (transformed DataFrame sorted by country and year, with a
+        fresh RangeIndex; indicator mapping dictionary)
+    """
+    indicator_mapping = dict(INDICATOR_MAPPING)
     
-    # Rename columns using the mapping
-    df_pivoted = df_pivoted.rename(columns=indicator_mapping)
+    # Warm runs skip the CSV parse, reshape and country lookups entirely
+    cache_path = cleaned_cache_path(file_path, handle_missing) if use_cache else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path), indicator_mapping
+        except ImportError:
+            pass
     
-    # Clean up the column names and handle missing values
-    df_clean = df_pivoted.copy()
+    # One row per (country, code, year) with a column per series code
+    df_pivoted = read_indicator_table(file_path, indicator_mapping.keys())
     
-    # Standardize column names
-    df_clean = df_clean.rename(columns={
+    # Rename the indicator and id columns in one pass; the reshaped table is
+    # already owned here, so no defensive copy is needed
+    df_clean = df_pivoted.rename(columns={
+        **indicator_mapping,
         'Country Name': 'country',
         'Country Code': 'iso_code'
     })
     
-    # Convert data types
+    # Indicator columns (already numeric from read_csv)
     numeric_columns = ['ann_income_pc_growth_pct', 'population_total', 
                       'life_expectancy_years', 'gdp_pc_usd']
     
-    for col in numeric_columns:
-        if col in df_clean.columns:
-            # Convert to numeric, handling non-numeric values and '..' as NaN
-            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+    # Narrow dtypes so every later pass moves half the bytes. Population stays
+    # float64: float32 cannot hold counts above 2**24 exactly
+    float32_columns = ['ann_income_pc_growth_pct', 'life_expectancy_years', 'gdp_pc_usd']
+    df_clean = df_clean.astype({col: 'float32' for col in float32_columns if col in df_clean.columns})
+    df_clean['year'] = df_clean['year'].astype('int16')
     
     # Standardize country codes
     df_clean = standardize_country_codes(df_clean)
     
+    # Establish the (country, year) order once; everything downstream relies on it.
+    # The reshape already produces this order, so this is normally just a check
+    if not is_sorted_by_country_year(df_clean):
+        df_clean = df_clean.sort_values(['country', 'year'], kind='stable')
+    
     # Handle missing data if requested
     if handle_missing:
         df_clean = handle_missing_data(df_clean, strategy='forward_fill')
     
-    # Drop rows where all indicator values are missing
-    df_clean = df_clean.dropna(subset=numeric_columns, how='all')
+    # Drop rows where all indicator values are missing, from one mask over the values
+    all_missing = np.isnan(df_clean[numeric_columns].to_numpy(dtype=float)).all(axis=1)
+    df_clean = df_clean[~all_missing]
     
-    # Sort the data
-    df_clean = df_clean.sort_values(['country', 'year'])
+    # Reset index (and drop the 'Series Code' columns name left by the reshape,
+    # which Parquet does not round-trip)
+    df_clean = df_clean.reset_index(drop=True).rename_axis(columns=None)
     
-    # Reset index
-    df_clean = df_clean.reset_index(drop=True)
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            df_clean.to_parquet(cache_path, engine='pyarrow', compression='zstd', index=False)
+        except ImportError:
+            logger.info("pyarrow not installed; cleaned data is not cached")
     
     return df_clean, indicator_mapping
 
@@ -1,10 +1,37 @@
+import hashlib
+import os
+import shutil
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Names of the feature tables engineer_features returns
+FEATURE_TABLES = ('main_data', 'latest_snapshot', 'world_aggregates')
+
+# Bump whenever a feature table's columns or dtypes change, so stale caches miss
+FEATURES_CACHE_VERSION = 2
+
+# Indicators the latest snapshot also carries for the prior year, as <col>_prev
+SNAPSHOT_PREVIOUS_YEAR_COLUMNS = ('gdp_pc_usd', 'life_expectancy_years', 'population_total',
+                                  'ann_income_pc_growth_pct')
+
+def sort_by_country_year(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sort a DataFrame by country and year in place, unless it already is.
+    
+    Args:
+        df: DataFrame with country and year columns
+        
+    Returns:
+        The same DataFrame
+    """
+    if not pd.MultiIndex.from_frame(df[['country', 'year']]).is_monotonic_increasing:
+        df.sort_values(['country', 'year'], inplace=True)
+    return df
+
 def compute_ranks(df: pd.DataFrame, year: int) -> pd.DataFrame:
     """
     Compute GDP and population ranks for each country in a specific year.
@@ -14,21 +41,18 @@ def compute_ranks(df: pd.DataFrame, year: int) -> pd.DataFrame:
         year: Year to compute ranks for
         
     Returns:
-        DataFrame with rank columns added
+        New DataFrame with rank columns added (df itself is not modified)
     """
-    df_ranked = df.copy()
-    
-    # Filter data for the specific year
-    year_data = df_ranked[df_ranked['year'] == year].copy()
-    
-    # Compute ranks
-    year_data['gdp_pc_rank'] = year_data['gdp_pc_usd'].rank(ascending=False, method='min')
-    year_data['population_rank'] = year_data['population_total'].rank(ascending=False, method='min')
+    # Rank only the rows of the specific year
+    in_year = df['year'] == year
+    year_data = df.loc[in_year, ['country', 'iso_code']].assign(
+        gdp_pc_rank=df.loc[in_year, 'gdp_pc_usd'].rank(ascending=False, method='min'),
+        population_rank=df.loc[in_year, 'population_total'].rank(ascending=False, method='min')
+    )
     
     # Merge ranks back to the main dataframe
-    rank_cols = ['country', 'iso_code', 'gdp_pc_rank', 'population_rank']
-    df_ranked = df_ranked.merge(
-        year_data[rank_cols], 
+    df_ranked = df.merge(
+        year_data, 
         on=['country', 'iso_code'], 
         how='left',
         suffixes=('', '_rank')
@@ -41,25 +65,23 @@ def compute_rolling_averages(df: pd.DataFrame, window: int = 3) -> pd.DataFrame:
     Compute rolling averages for specified columns.
     
     Args:
-        df: Cleaned DataFrame
+        df: Cleaned DataFrame; sorted by country and year and given the new
+            columns in place
         window: Rolling window size
         
     Returns:
-        DataFrame with rolling average columns added
+        The same DataFrame with rolling average columns added
     """
-    df_rolling = df.copy()
-    
     # Sort by country and year
-    df_rolling = df_rolling.sort_values(['country', 'year'])
+    df_rolling = sort_by_country_year(df)
     
     # Compute rolling averages for each country
     rolling_cols = ['ann_income_pc_growth_pct']
     
     for col in rolling_cols:
         if col in df_rolling.columns:
-            df_rolling[f'{col}_rolling_{window}yr'] = df_rolling.groupby('country')[col].transform(
-                lambda x: x.rolling(window=window, min_periods=1).mean()
-            )
+            rolling_mean = df_rolling.groupby('country', sort=False)[col].rolling(window=window, min_periods=1).mean()
+            df_rolling[f'{col}_rolling_{window}yr'] = rolling_mean.reset_index(level=0, drop=True)
     
     return df_rolling
 
@@ -67,22 +89,28 @@ def create_latest_year_snapshot(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create a snapshot of the latest available year for each country.
     
+    Each indicator in SNAPSHOT_PREVIOUS_YEAR_COLUMNS is also given as its
+    value in the year before, in a <col>_prev column (NaN when the country
+    has no row for that year), so year-on-year KPIs need only the snapshot.
+    
     Args:
         df: Cleaned DataFrame
         
     Returns:
         DataFrame with latest year data for each country
     """
-    # Get the latest year for each country
-    latest_years = df.groupby('country')['year'].max().reset_index()
+    # Pick the row holding each country's latest year directly, with no join
+    latest_rows = df.groupby('country', observed=True)['year'].idxmax()
     
-    # Merge to get the latest data for each country
-    latest_snapshot = pd.merge(
-        latest_years, 
-        df, 
-        on=['country', 'year'], 
-        how='left'
-    )
+    # Keep the country and year columns first, as the snapshot has always had them
+    columns = ['country', 'year'] + [col for col in df.columns if col not in ('country', 'year')]
+    latest_snapshot = df.loc[latest_rows, columns].reset_index(drop=True)
+    
+    # Look up each country's row for the year before its latest year
+    previous_keys = pd.MultiIndex.from_arrays([latest_snapshot['country'], latest_snapshot['year'] - 1])
+    previous = df.set_index(['country', 'year'])[list(SNAPSHOT_PREVIOUS_YEAR_COLUMNS)].reindex(previous_keys)
+    for col in SNAPSHOT_PREVIOUS_YEAR_COLUMNS:
+        latest_snapshot[f'{col}_prev'] = previous[col].to_numpy()
     
     return latest_snapshot
 
@@ -90,23 +118,31 @@ def compute_world_aggregates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute world aggregates (population-weighted averages).
     
+    Missing indicator values are left out of that indicator's average, and
+    a year with no values for an indicator gets NaN.
+    
     Args:
         df: Cleaned DataFrame
         
     Returns:
         DataFrame with world aggregate metrics
     """
-    world_agg = df.copy()
+    weights = df['population_total']
+    
+    # Weighted sums per year; each indicator only weighs the rows where it is present
+    weighted = pd.DataFrame({'year': df['year'], 'population': weights})
+    for col in ('gdp_pc_usd', 'life_expectancy_years', 'ann_income_pc_growth_pct'):
+        weighted[f'{col}_weighted'] = df[col] * weights
+        weighted[f'{col}_weight'] = weights.where(df[col].notna())
+    
+    totals = weighted.groupby('year').sum()
     
-    # Group by year and compute weighted averages
-    world_metrics = world_agg.groupby('year').apply(
-        lambda x: pd.Series({
-            'world_gdp_pc_weighted': np.average(x['gdp_pc_usd'], weights=x['population_total']),
-            'world_life_expectancy_weighted': np.average(x['life_expectancy_years'], weights=x['population_total']),
-            'world_income_growth_weighted': np.average(x['ann_income_pc_growth_pct'], weights=x['population_total']),
-            'world_population_total': x['population_total'].sum()
-        })
-    ).reset_index()
+    world_metrics = pd.DataFrame({
+        'world_gdp_pc_weighted': totals['gdp_pc_usd_weighted'] / totals['gdp_pc_usd_weight'],
+        'world_life_expectancy_weighted': totals['life_expectancy_years_weighted'] / totals['life_expectancy_years_weight'],
+        'world_income_growth_weighted': totals['ann_income_pc_growth_pct_weighted'] / totals['ann_income_pc_growth_pct_weight'],
+        'world_population_total': totals['population']
+    }).reset_index()
     
     return world_metrics
 
@@ -115,41 +151,79 @@ def calculate_year_over_year_changes(df: pd.DataFrame) -> pd.DataFrame:
     Calculate year-over-year changes for key metrics.
     
     Args:
-        df: Cleaned DataFrame
+        df: Cleaned DataFrame; sorted by country and year and given the new
+            columns in place
         
     Returns:
-        DataFrame with YoY change columns
+        The same DataFrame with YoY change columns added
     """
-    df_yoy = df.copy()
-    
     # Sort by country and year
-    df_yoy = df_yoy.sort_values(['country', 'year'])
+    df_yoy = sort_by_country_year(df)
     
     # Calculate YoY changes
     metrics = ['gdp_pc_usd', 'life_expectancy_years', 'population_total']
     
     for metric in metrics:
         if metric in df_yoy.columns:
-            df_yoy[f'{metric}_yoy_pct'] = df_yoy.groupby('country')[metric].pct_change() * 100
+            # Previous year's value within each country; NaN for a country's first year
+            previous = df_yoy.groupby('country', sort=False)[metric].shift(1, fill_value=np.nan)
+            df_yoy[f'{metric}_yoy_pct'] = (df_yoy[metric] - previous) / previous * 100
     
     return df_yoy
 
-def engineer_features(df: pd.DataFrame, reference_year: int = 2023) -> Dict[str, pd.DataFrame]:
+def features_cache_dir(df: pd.DataFrame, reference_year: int, cache_dir: str) -> str:
+    """
+    Directory of the cached feature tables for an input frame and reference year.
+    
+    The name hashes the frame's contents (values, index and column names)
+    with the reference year and cache version, so any change to the cleaned
+    data misses the cache.
+    
+    Args:
+        df: Cleaned DataFrame
+        reference_year: Year used for ranking calculations
+        cache_dir: Root cache directory
+        
+    Returns:
+        Path of the cache directory (which may not exist yet)
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(f"{FEATURES_CACHE_VERSION}:{reference_year}:{list(df.columns)}".encode())
+    return os.path.join(cache_dir, 'features', digest.hexdigest())
+
+def engineer_features(df: pd.DataFrame, reference_year: int = 2023,
+                      cache_dir: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """
     Main function to engineer all features.
     
     Args:
         df: Cleaned DataFrame
         reference_year: Year to use for ranking calculations
+        cache_dir: Optional directory for a Parquet cache of the result,
+            keyed on the contents of df
         
     Returns:
         Dictionary with various feature DataFrames
     """
+    # Warm runs load the tables instead of recomputing them
+    table_dir = features_cache_dir(df, reference_year, cache_dir) if cache_dir else None
+    if table_dir and os.path.isdir(table_dir):
+        try:
+            return {name: pd.read_parquet(os.path.join(table_dir, f'{name}.parquet'))
+                    for name in FEATURE_TABLES}
+        except (ImportError, OSError):
+            pass
+    
     logger.info("Engineering features...")
     
-    # Compute ranks for the reference year
+    # Compute ranks for the reference year; the merge makes the one new frame
+    # that the later steps add their columns to in place
     df_with_ranks = compute_ranks(df, reference_year)
     
+    # The loader returns rows sorted by country and year and the merge keeps
+    # that order, so this only sorts frames from elsewhere
+    sort_by_country_year(df_with_ranks)
+    
     # Compute rolling averages
     df_with_rolling = compute_rolling_averages(df_with_ranks)
     
@@ -169,6 +243,20 @@ def engineer_features(df: pd.DataFrame, reference_year: int = 2023) -> Dict[str,
         'world_aggregates': world_aggregates
     }
     
+    if table_dir:
+        try:
+            # Write to a temporary directory and rename, so readers never see a partial cache
+            tmp_dir = f'{table_dir}.tmp{os.getpid()}'
+            os.makedirs(tmp_dir, exist_ok=True)
+            for name, feature_df in features.items():
+                feature_df.to_parquet(os.path.join(tmp_dir, f'{name}.parquet'), engine='pyarrow', compression='zstd')
+            os.replace(tmp_dir, table_dir)
+        except ImportError:
+            logger.info("pyarrow not installed; features are not cached")
+        except OSError:
+            # Another process cached the same tables first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
     logger.info("Feature engineering completed!")
     return features
 
@@ -188,6 +276,62 @@ def save_features(features: Dict[str, pd.DataFrame], output_dir: str) -> None:
         df.to_csv(file_path, index=False)
         logger.info(f"Saved {name} to {file_path}")
 
+def downcast_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast numeric columns and make country categorical for compact storage.
+    
+    Args:
+        df: Feature DataFrame
+        
+    Returns:
+        DataFrame with smallest lossless integer dtypes, float32 where pandas
+        can downcast floats, and a categorical country column
+    """
+    df_compact = df.copy()
+    
+    for col in df_compact.select_dtypes(include='integer').columns:
+        df_compact[col] = pd.to_numeric(df_compact[col], downcast='integer')
+    
+    for col in df_compact.select_dtypes(include='floating').columns:
+        df_compact[col] = pd.to_numeric(df_compact[col], downcast='float')
+    
+    if 'country' in df_compact.columns:
+        df_compact['country'] = df_compact['country'].astype('category')
+    
+    return df_compact
+
+def save_features_parquet(features: Dict[str, pd.DataFrame], output_dir: str) -> None:
+    """
+    Save all feature DataFrames as downcast, zstd-compressed Parquet files.
+    
+    Args:
+        features: Dictionary of feature DataFrames
+        output_dir: Directory to save files
+    """
+    import os
+    os.makedirs(output_dir, exist_ok=True)
+    
+    for name, df in features.items():
+        file_path = os.path.join(output_dir, f'{name}.parquet')
+        downcast_dtypes(df).to_parquet(file_path, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"Saved {name} to {file_path}")
+
+def save_features_feather(features: Dict[str, pd.DataFrame], output_dir: str) -> None:
+    """
+    Save all feature DataFrames as downcast, uncompressed Arrow IPC (Feather v2)
+    files, which the dashboard memory-maps instead of decoding.
+    
+    Args:
+        features: Dictionary of feature DataFrames
+        output_dir: Directory to save files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    for name, df in features.items():
+        file_path = os.path.join(output_dir, f'{name}.feather')
+        downcast_dtypes(df).reset_index(drop=True).to_feather(file_path, compression='uncompressed')
+        logger.info(f"Saved {name} to {file_path}")
+
 # Test function
 if __name__ == "__main__":
     # Test the feature engineering
@@ -220,6 +364,8 @@ if __name__ == "__main__":
         
         # Save features
         save_features(features, '../data/processed/features')
+        save_features_parquet(features, '../data/processed/features')
+        save_features_feather(features, '../data/processed/features')
         
         # Show sample of engineered data
         print("\nSample of engineered data (first 3 rows):")
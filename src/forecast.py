@@ -4,52 +4,165 @@ Forecasting functions for the Streamlit dashboard.
 
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+import streamlit as st
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import warnings
 warnings.filterwarnings('ignore')
 
-def prepare_forecast_data(main_data, country, indicator, min_data_points=5):
+# Numba is optional; without it the kernels below run as plain numpy code
+try:
+    from numba import njit, prange
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    prange = range
+
+@njit(cache=True)
+def ols_forecast(x, y, future_x):
+    """
+    Fit y = a + b * x by closed-form least squares and predict at future_x.
+    """
+    n = x.shape[0]
+    x_mean = 0.0
+    y_mean = 0.0
+    for i in range(n):
+        x_mean += x[i]
+        y_mean += y[i]
+    x_mean /= n
+    y_mean /= n
+    
+    sxy = 0.0
+    sxx = 0.0
+    for i in range(n):
+        dx = x[i] - x_mean
+        sxy += dx * (y[i] - y_mean)
+        sxx += dx * dx
+    
+    slope = sxy / sxx if sxx != 0.0 else 0.0
+    intercept = y_mean - slope * x_mean
+    
+    predictions = np.empty(future_x.shape[0])
+    for i in range(future_x.shape[0]):
+        predictions[i] = intercept + slope * future_x[i]
+    return predictions
+
+@njit(parallel=True, cache=True)
+def batch_linear_fit(offsets, x, y):
+    """
+    Fit y = a + b * x by closed-form least squares for many series at once.
+    
+    Series i occupies x[offsets[i]:offsets[i + 1]] (and the same slice of y);
+    returns arrays of slopes and intercepts, one per series.
+    """
+    n_series = offsets.shape[0] - 1
+    slopes = np.empty(n_series)
+    intercepts = np.empty(n_series)
+    
+    for i in prange(n_series):
+        start = offsets[i]
+        end = offsets[i + 1]
+        n = end - start
+        
+        x_mean = 0.0
+        y_mean = 0.0
+        for j in range(start, end):
+            x_mean += x[j]
+            y_mean += y[j]
+        x_mean /= n
+        y_mean /= n
+        
+        sxy = 0.0
+        sxx = 0.0
+        for j in range(start, end):
+            dx = x[j] - x_mean
+            sxy += dx * (y[j] - y_mean)
+            sxx += dx * dx
+        
+        slope = sxy / sxx if sxx != 0.0 else 0.0
+        slopes[i] = slope
+        intercepts[i] = y_mean - slope * x_mean
+    
+    return slopes, intercepts
+
+def fit_linear_trends(by_country, indicator, min_data_points=5):
+    """
+    Fit a linear trend for one indicator in every country in a single
+    compiled batch.
+    
+    Uses the same series and minimum length as prepare_forecast_data, and
+    returns a country-indexed DataFrame with slope and intercept columns.
+    """
+    countries = []
+    series = []
+    for country, country_series in by_country.items():
+        if indicator not in country_series:
+            continue
+        ts = country_series[indicator].dropna()
+        if len(ts) >= min_data_points:
+            countries.append(country)
+            series.append(ts)
+    
+    if not series:
+        return pd.DataFrame({'slope': [], 'intercept': []}, index=pd.Index([], name='country'))
+    
+    # Concatenate all series and mark where each one starts
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(ts) for ts in series])
+    x = np.concatenate([np.asarray(ts.index.values, dtype=np.float64) for ts in series])
+    y = np.concatenate([np.asarray(ts.values, dtype=np.float64) for ts in series])
+    
+    slopes, intercepts = batch_linear_fit(offsets, x, y)
+    
+    return pd.DataFrame({'slope': slopes, 'intercept': intercepts},
+                        index=pd.Index(countries, name='country'))
+
+def prepare_forecast_data(by_country, country, indicator, min_data_points=5):
     """
     Prepare data for forecasting by selecting a country and an indicator,
     and returning a clean time series with no missing values.
+    
+    by_country is the {country: {indicator: year-indexed Series}} lookup
+    built by load_all_data.
     """
-    # Filter data for the selected country and indicator
-    country_data = main_data[main_data['country'] == country]
+    # Look up the precomputed series for the selected country and indicator
+    country_series = by_country.get(country)
     
-    if country_data.empty:
+    if country_series is None or indicator not in country_series:
         return None
     
-    # Create a time series for the selected indicator
-    ts_data = country_data[['year', indicator]].dropna()
+    # Drop missing values; the series is already sorted by year
+    ts_data = country_series[indicator].dropna()
     
     # Check if we have enough data points
     if len(ts_data) < min_data_points:
         return None
     
-    # Set year as index and sort
-    ts_data = ts_data.set_index('year').sort_index()
-    
-    return ts_data
+    return ts_data.to_frame()
 
-def linear_regression_forecast(ts_data, forecast_years=5):
+@st.cache_data(show_spinner=False, ttl=600)
+def linear_regression_forecast(ts_data, forecast_years=5, trend=None):
     """
     Perform linear regression forecast.
-    """
-    # Prepare data for regression
-    X = np.array(ts_data.index.values).reshape(-1, 1)
-    y = ts_data.values
-    
-    # Fit linear regression model
-    model = LinearRegression()
-    model.fit(X, y)
     
+    trend is an optional (slope, intercept) pair already fitted to ts_data,
+    e.g. a row of fit_linear_trends; without it the fit is done here.
+    """
     # Generate future years for prediction
     last_year = ts_data.index.max()
-    future_years = np.arange(last_year + 1, last_year + forecast_years + 1).reshape(-1, 1)
+    future_years = np.arange(last_year + 1, last_year + forecast_years + 1)
     
-    # Predict future values
-    future_predictions = model.predict(future_years)
+    if trend is not None:
+        slope, intercept = trend
+        future_predictions = intercept + slope * future_years.astype(np.float64)
+    else:
+        # Prepare float64 arrays for the compiled regression kernel
+        X = np.asarray(ts_data.index.values, dtype=np.float64)
+        y = np.asarray(ts_data.values, dtype=np.float64).ravel()
+        
+        # Fit and predict in one pass
+        future_predictions = ols_forecast(X, y, future_years.astype(np.float64))
     
     # Create result DataFrame
     historical = pd.DataFrame({
@@ -66,6 +179,7 @@ def linear_regression_forecast(ts_data, forecast_years=5):
     
     return pd.concat([historical, forecast], ignore_index=True)
 
+@st.cache_data(show_spinner=False, ttl=600)
 def exponential_smoothing_forecast(ts_data, forecast_years=5):
     """
     Perform exponential smoothing forecast (Holt-Winters).
@@ -101,6 +215,7 @@ def exponential_smoothing_forecast(ts_data, forecast_years=5):
         # Fall back to linear regression if exponential smoothing fails
         return linear_regression_forecast(ts_data, forecast_years)
 
+@st.cache_data(show_spinner=False, ttl=600)
 def create_forecast_chart(forecast_data, country, indicator):
     """
     Create a forecast chart with historical data and predictions.
@@ -116,7 +231,7 @@ def create_forecast_chart(forecast_data, country, indicator):
     fig = go.Figure()
     
     # Add historical data
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=historical['year'],
         y=historical['value'],
         mode='lines+markers',
@@ -126,7 +241,7 @@ def create_forecast_chart(forecast_data, country, indicator):
     ))
     
     # Add forecast data
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=forecast['year'],
         y=forecast['value'],
         mode='lines+markers',
@@ -140,7 +255,7 @@ def create_forecast_chart(forecast_data, country, indicator):
         last_historical_value = historical['value'].iloc[-1]
         forecast_std = historical['value'].std()
         
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=forecast['year'],
             y=forecast['value'] + forecast_std,
             mode='lines',
@@ -149,7 +264,7 @@ def create_forecast_chart(forecast_data, country, indicator):
             hoverinfo='skip'
         ))
         
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=forecast['year'],
             y=forecast['value'] - forecast_std,
             mode='lines',
@@ -203,26 +203,67 @@ def get_css_styles():
         padding: 0.5rem;
     }
 
+    /* KPI card row */
+    .kpi-row {
+        display: grid;
+        grid-template-columns: repeat(4, minmax(0, 1fr));
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }
+    
+    /* Relationships page */
+    .relationships-filter-section {
+        background-color: #f8f9fa;
+        padding: 1rem;
+        border-radius: 8px;
+        margin-bottom: 1.5rem;
+        border: 1px solid #e2e8f0;
+    }
+    
+    .relationships-filter-header {
+        font-weight: 600;
+        margin-bottom: 0.8rem;
+        color: #2d3748;
+        font-size: 1rem;
+    }
+    
+    .chart-subtitle {
+        font-size: 0.9rem;
+        color: #718096;
+        margin-bottom: 1rem;
+        font-style: italic;
+    }
+    
     .insight-card {
-    background: white;
-    padding: 1.5rem;
-    border-radius: 12px;
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-    margin-bottom: 1.5rem;
-}
-
-.insight-title {
-    font-size: 1.1rem;
-    font-weight: 600;
-    margin-bottom: 1rem;
-    color: #2d3748;
-}
-
-.insight-content {
-    font-size: 0.95rem;
-    color: #4a5568;
-    line-height: 1.6;
-}
+        background: white;
+        padding: 1.5rem;
+        border-radius: 12px;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1.5rem;
+        border-left: 4px solid #667eea;
+    }
+    
+    .insight-title {
+        font-size: 1.1rem;
+        font-weight: 600;
+        margin-bottom: 1rem;
+        color: #2d3748;
+    }
+    
+    .insight-content {
+        font-size: 0.95rem;
+        color: #4a5568;
+        line-height: 1.6;
+    }
+    
+    .insight-content ul {
+        margin: 0;
+        padding-left: 1.2rem;
+    }
+    
+    .insight-content li {
+        margin-bottom: 0.5rem;
+    }
     
     /* Responsive design */
     @media (max-width: 768px) {
@@ -238,6 +279,10 @@ def get_css_styles():
             font-size: 1.6rem;
         }
         
+        .kpi-row {
+            grid-template-columns: repeat(2, minmax(0, 1fr));
+        }
+        
         .chart-container {
             padding: 1rem;
         }
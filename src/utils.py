@@ -2,63 +2,242 @@
 Utility functions for the Streamlit dashboard.
 """
 
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
+from src.forecast import fit_linear_trends
 
-@st.cache_data
-def load_all_data() -> Dict[str, pd.DataFrame]:
+FEATURES_DIR = 'data/processed/features'
+
+# Columns of the latest snapshot the pages use; the rest of the table is not loaded
+LATEST_SNAPSHOT_COLUMNS = ['country', 'year', 'gdp_pc_usd', 'life_expectancy_years',
+                           'population_total', 'ann_income_pc_growth_pct',
+                           'gdp_pc_usd_prev', 'life_expectancy_years_prev',
+                           'population_total_prev', 'ann_income_pc_growth_pct_prev']
+
+@st.cache_resource(show_spinner=False)
+def open_feather_table(path: str, mtime_ns: int):
+    """
+    Memory-map a Feather feature table once per process and file version.
+    
+    The mapped pyarrow Table is shared by every later read, so a cache miss in
+    load_all_data skips reopening the file and parsing its schema. mtime_ns
+    only keys the resource, so a regenerated file is mapped afresh.
+    """
+    from pyarrow import feather
+    return feather.read_table(path, memory_map=True)
+
+def read_feature_table(name: str, features_dir: str = FEATURES_DIR,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a processed feature table, preferring memory-mapped Arrow IPC (Feather),
+    then Parquet, and falling back to CSV.
+    
+    columns, if given, limits the read to those columns.
+    """
+    feather_path = os.path.join(features_dir, f'{name}.feather')
+    if os.path.exists(feather_path):
+        try:
+            table = open_feather_table(feather_path, os.stat(feather_path).st_mtime_ns)
+            # Uncompressed IPC is memory-mapped, so only the projected columns are paged in
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas()
+        except ImportError:
+            pass
+    
+    parquet_path = os.path.join(features_dir, f'{name}.parquet')
+    if os.path.exists(parquet_path):
+        try:
+            return pd.read_parquet(parquet_path, columns=columns, engine='pyarrow')
+        except ImportError:
+            pass
+    
+    return pd.read_csv(os.path.join(features_dir, f'{name}.csv'), usecols=columns)
+
+# Population counts, kept exact when downcasting
+POPULATION_COLUMNS = ['population_total', 'population_total_prev', 'world_population_total']
+
+def downcast_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store float columns as float32, and integer columns (year, population) as the
+    smallest integer type that fits.
+    
+    Population columns are only ever downcast as integers, since float32 cannot
+    hold exact counts in the billions.
+    """
+    population_columns = df.columns.intersection(POPULATION_COLUMNS)
+    for col in df.select_dtypes(include='floating').columns.difference(population_columns):
+        df[col] = df[col].astype('float32')
+    for col in df.select_dtypes(include='integer').columns.union(population_columns):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+# Feature tables read by load_all_data; world_aggregates is not used by any page
+FEATURE_TABLE_NAMES = ('main_data', 'latest_snapshot')
+
+def features_version(features_dir: str = FEATURES_DIR) -> Tuple[Tuple[str, int], ...]:
+    """
+    Modification times of the feature table files, used to key the persisted data caches.
+    """
+    version = []
+    for name in FEATURE_TABLE_NAMES:
+        for ext in ('feather', 'parquet', 'csv'):
+            path = os.path.join(features_dir, f'{name}.{ext}')
+            if os.path.exists(path):
+                version.append((path, os.stat(path).st_mtime_ns))
+    return tuple(version)
+
+def load_all_data(features_dir: str = FEATURES_DIR) -> Dict[str, pd.DataFrame]:
     """
     Load all processed data with caching.
     """
     try:
-        # Load main data with features
-        main_data = pd.read_csv('data/processed/features/main_data.csv')
-        
-        # Load latest snapshot
-        latest_snapshot = pd.read_csv('data/processed/features/latest_snapshot.csv')
-        
-        # Load world aggregates
-        world_aggregates = pd.read_csv('data/processed/features/world_aggregates.csv')
-        
-        return {
-            'main_data': main_data,
-            'latest_snapshot': latest_snapshot,
-            'world_aggregates': world_aggregates
-        }
+        return _build_dashboard_data(features_version(features_dir), features_dir)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return {}
 
+# Only the raw tables are persisted: st.cache_data pickles its value and
+# unpickles it on every hit, so it holds no derived copies. Keyed on the feature
+# files' mtimes so regenerated features invalidate it; max_entries=1 drops the
+# superseded entry. Streamlit ignores ttl for disk-persisted caches, so none is
+# set. Errors propagate (and are not cached) so a failed load is never persisted.
+@st.cache_data(persist="disk", max_entries=1, show_spinner=False)
+def _load_feature_tables(version: Tuple[Tuple[str, int], ...],
+                         features_dir: str = FEATURES_DIR) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Read the main data and latest snapshot tables (cached per features version).
+    """
+    # The two reads are independent and release the GIL while decoding,
+    # so run them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        main_future = executor.submit(read_feature_table, 'main_data', features_dir)
+        latest_future = executor.submit(read_feature_table, 'latest_snapshot', features_dir, columns=LATEST_SNAPSHOT_COLUMNS)
+        
+        # Load main data with features
+        main_data = downcast_indicators(main_future.result())
+        
+        # Load latest snapshot
+        latest_snapshot = downcast_indicators(latest_future.result())
+    
+    # Categorical country turns isin/groupby/unique into integer-code operations
+    main_data['country'] = main_data['country'].astype('category')
+    latest_snapshot['country'] = latest_snapshot['country'].astype('category')
+    
+    return main_data, latest_snapshot
+
+# The derived views are built once per process and features version and shared,
+# not copied, between sessions; pages must treat them as read-only.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _build_dashboard_data(version: Tuple[Tuple[str, int], ...],
+                          features_dir: str = FEATURES_DIR) -> Dict[str, Any]:
+    """
+    Build the indexed views, per-country series and forecast trends the pages
+    use from the raw tables (cached per features version).
+    """
+    main_data, latest_snapshot = _load_feature_tables(version, features_dir)
+    
+    # (country, year)-indexed view so selections are index slices, not column scans
+    main_by_country_year = main_data.set_index(['country', 'year']).sort_index()
+    
+    # Per-country indicator series keyed by year, for forecasts
+    by_country = {
+        country: group.set_index('year').sort_index()[list(INDICATOR_COLUMNS)].to_dict('series')
+        for country, group in main_data.groupby('country', observed=True, sort=False)
+    }
+    
+    # Linear forecast trends for every country, fitted in one batch per indicator
+    linear_trends = {indicator: fit_linear_trends(by_country, indicator) for indicator in INDICATOR_COLUMNS}
+    
+    # Precompute ranks once; they depend on the snapshot, not the selection
+    latest_snapshot = latest_snapshot.assign(
+        gdp_rank=latest_snapshot['gdp_pc_usd'].rank(ascending=False, method='min').astype('Int32'),
+        population_rank=latest_snapshot['population_total'].rank(ascending=False, method='min').astype('Int32'),
+    )
+    
+    # Country-indexed view for O(k) lookups of the selected countries
+    latest_by_country = latest_snapshot.set_index('country', inplace=False)
+    
+    return {
+        'main_data': main_data,
+        'main_by_country_year': main_by_country_year,
+        # Sidebar options, computed once per load rather than hashed per rerun
+        'available_countries': get_available_countries(main_data),
+        'available_years': get_available_years(main_data),
+        'by_country': by_country,
+        'linear_trends': linear_trends,
+        'latest_snapshot': latest_snapshot,
+        'latest_by_country': latest_by_country,
+        # Feature file stamps, for caches keyed on the selection rather than the frames
+        'version': version
+    }
+
 def format_number(number: float, precision: int = 0) -> str:
     """
     Format numbers with appropriate suffixes and precision.
     """
-    if pd.isna(number):
+    # NaN is the only value not equal to itself
+    if number != number:
         return "N/A"
     
-    if abs(number) >= 1_000_000_000:
+    magnitude = -number if number < 0 else number
+    if magnitude >= 1_000_000_000:
         return f"{number / 1_000_000_000:.{precision}f}B"
-    elif abs(number) >= 1_000_000:
+    elif magnitude >= 1_000_000:
         return f"{number / 1_000_000:.{precision}f}M"
-    elif abs(number) >= 1_000:
+    elif magnitude >= 1_000:
         return f"{number / 1_000:.{precision}f}K"
     else:
         return f"{number:.{precision}f}"
 
+# Magnitude bins for format_number_values: below 1K, K, M, B
+NUMBER_SCALE_EDGES = np.array([1_000, 1_000_000, 1_000_000_000])
+NUMBER_SCALE_DIVISORS = np.array([1, 1_000, 1_000_000, 1_000_000_000])
+NUMBER_SCALE_SUFFIXES = np.array(["", "K", "M", "B"])
+
+def format_number_values(values: np.ndarray, precision: int = 0, na_value: str = "N/A") -> np.ndarray:
+    """
+    Vectorized format_number: bin the magnitudes once with np.digitize, look up
+    the suffix and divisor by bin, and format the whole array at once.
+    """
+    values = np.asarray(values, dtype=float)
+    scale = np.digitize(np.abs(values), NUMBER_SCALE_EDGES)
+    divisor = NUMBER_SCALE_DIVISORS[scale]
+    suffix = NUMBER_SCALE_SUFFIXES[scale]
+    formatted = np.char.add(np.char.mod(f"%.{precision}f", values / divisor), suffix).astype(object)
+    formatted[np.isnan(values)] = na_value
+    return formatted
+
+def format_values(values: np.ndarray, formatter, na_value: str = "N/A") -> np.ndarray:
+    """
+    Format an array of numbers, with the missing-value check done in numpy.
+    
+    Only the non-missing entries go through the Python formatter; missing
+    entries get na_value.
+    """
+    values = np.asarray(values, dtype=float)
+    mask = ~np.isnan(values)
+    formatted = np.full(values.shape, na_value, dtype=object)
+    formatted[mask] = [formatter(v) for v in values[mask]]
+    return formatted
+
+# Lookups indexed by sign(change) + 1: negative, zero, positive
+CHANGE_ICONS = ("▼", "─", "▲")
+CHANGE_COLORS = ("red", "gray", "green")
+CHANGE_CLASSES = ("negative-change", "", "positive-change")
+
 def get_change_icon(change: float) -> str:
     """
     Get appropriate icon for value changes.
     """
     if pd.isna(change):
         return ""
-    elif change > 0:
-        return "▲"
-    elif change < 0:
-        return "▼"
-    else:
-        return "─"
+    return CHANGE_ICONS[int(change > 0) - int(change < 0) + 1]
 
 def get_change_color(change: float) -> str:
     """
@@ -66,12 +245,7 @@ def get_change_color(change: float) -> str:
     """
     if pd.isna(change):
         return "gray"
-    elif change > 0:
-        return "green"
-    elif change < 0:
-        return "red"
-    else:
-        return "gray"
+    return CHANGE_COLORS[int(change > 0) - int(change < 0) + 1]
 
 def get_change_class(change: float) -> str:
     """
@@ -79,52 +253,195 @@ def get_change_class(change: float) -> str:
     """
     if pd.isna(change):
         return ""
-    elif change > 0:
-        return "positive-change"
-    elif change < 0:
-        return "negative-change"
-    else:
-        return ""
+    return CHANGE_CLASSES[int(change > 0) - int(change < 0) + 1]
+
+def change_lookup_values(changes: np.ndarray, lookup: Tuple[str, str, str], na_value: str) -> np.ndarray:
+    """
+    Vectorized sign lookup: map an array of changes onto a negative/zero/positive lookup in one pass.
+    """
+    changes = np.asarray(changes, dtype=float)
+    return np.select(
+        [np.isnan(changes), changes > 0, changes < 0],
+        [na_value, lookup[2], lookup[0]],
+        lookup[1]
+    ).astype(object)
+
+def get_change_icons(changes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_change_icon.
+    """
+    return change_lookup_values(changes, CHANGE_ICONS, "")
+
+def get_change_colors(changes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_change_color.
+    """
+    return change_lookup_values(changes, CHANGE_COLORS, "gray")
+
+def get_change_classes(changes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_change_class.
+    """
+    return change_lookup_values(changes, CHANGE_CLASSES, "")
+
+# Indicator columns shown in summaries and reports
+INDICATOR_COLUMNS = ('gdp_pc_usd', 'life_expectancy_years', 'population_total', 'ann_income_pc_growth_pct')
 
-def filter_data(df: pd.DataFrame, countries: List[str], years: List[int]) -> pd.DataFrame:
+# Bin edges and labels matching the correlation interpretation guide
+CORRELATION_EDGES = np.array([-0.7, -0.3, -0.1, 0.1, 0.3, 0.7])
+CORRELATION_LABELS = [
+    'Strong negative', 'Moderate negative', 'Weak negative', 'No relationship',
+    'Weak positive', 'Moderate positive', 'Strong positive'
+]
+
+def get_correlation_label(correlation: float) -> str:
+    """
+    Get a strength label for a correlation coefficient.
+    """
+    if pd.isna(correlation):
+        return "N/A"
+    return CORRELATION_LABELS[int(np.searchsorted(CORRELATION_EDGES, correlation))]
+
+def country_level_mask(index: pd.MultiIndex, countries: Tuple[str, ...], level: int = 0) -> np.ndarray:
     """
-    Filter data based on selected countries and years.
+    Boolean mask of the rows whose country is one of countries.
+    
+    The countries are translated to the level's integer codes once, so the
+    per-row test is an integer lookup table rather than label hashing.
+    """
+    wanted_codes = index.levels[level].get_indexer(countries)
+    return np.isin(index.codes[level], wanted_codes[wanted_codes >= 0], kind='table')
+
+@st.cache_data(max_entries=128, ttl="1h", show_spinner=False)
+def filter_data(_df: pd.DataFrame, countries: Tuple[str, ...], year_range: Tuple[int, int],
+                version: Tuple[Tuple[str, int], ...]) -> pd.DataFrame:
+    """
+    Filter data based on selected countries and an inclusive (first, last)
+    year range, as returned by the range slider (cached per selection).
+    
+    Expects the sorted (country, year)-indexed frame from load_all_data and
+    its data version, and returns a flat DataFrame with country and year as
+    columns. The frame is not hashed (leading underscore); the selection and
+    the data version make up the cache key.
     """
-    filtered_df = df.copy()
+    first_year, last_year = year_range
+    
+    # Compared against the raw year values
+    year_values = _df.index.get_level_values(1).to_numpy()
+    mask = (year_values >= first_year) & (year_values <= last_year)
     
     if countries:
-        filtered_df = filtered_df[filtered_df['country'].isin(countries)]
+        mask &= country_level_mask(_df.index, countries)
     
-    if years:
-        filtered_df = filtered_df[filtered_df['year'].between(min(years), max(years))]
+    return _df[mask].reset_index()
+
+@st.cache_data(max_entries=128, ttl="1h", show_spinner=False)
+def year_correlations(df: pd.DataFrame, countries: Tuple[str, ...], year: int) -> Optional[pd.DataFrame]:
+    """
+    Correlation matrix of the indicator columns for the selected countries
+    in a single year (cached per selection).
+    
+    Expects the sorted (country, year)-indexed frame from load_all_data and
+    returns None when no rows match.
+    """
+    mask = country_level_mask(df.index, countries) & (df.index.get_level_values(1).to_numpy() == year)
+    year_data = df.loc[mask, list(INDICATOR_COLUMNS)]
     
-    return filtered_df
+    if year_data.empty:
+        return None
+    
+    return year_data.corr()
 
 def get_available_countries(df: pd.DataFrame) -> List[str]:
     """
     Get sorted list of available countries.
     """
+    if isinstance(df['country'].dtype, pd.CategoricalDtype):
+        return df['country'].cat.categories.tolist()
     return sorted(df['country'].unique())
 
 def get_available_years(df: pd.DataFrame) -> List[int]:
     """
     Get sorted list of available years.
     """
-    return sorted(df['year'].unique())
+    return np.unique(df['year'].to_numpy()).tolist()
 
 def calculate_kpis(df: pd.DataFrame, current_year: int, previous_year: int) -> Dict[str, Any]:
     """
     Calculate KPIs for the current year with changes from previous year.
     These represent aggregate values across all selected countries.
     """
-    current_data = df[df['year'] == current_year]
-    previous_data = df[df['year'] == previous_year]
+    # All four aggregates for both years in one grouped pass
+    years = df['year'].to_numpy()
+    aggregates = df.loc[(years == current_year) | (years == previous_year)].groupby('year', sort=False).agg(
+        gdp=('gdp_pc_usd', 'median'),
+        life=('life_expectancy_years', 'median'),
+        population=('population_total', 'sum'),
+        income=('ann_income_pc_growth_pct', 'mean'),
+    )
+    # A year with no rows has no group: its medians and mean are NaN and its population sum is 0
+    aggregates = aggregates.reindex([current_year, previous_year]).fillna({'population': 0})
     
+    return kpis_from_aggregates(aggregates)
+
+# (KPI aggregate, snapshot column, reduction) for calculate_snapshot_kpis
+SNAPSHOT_KPI_AGGREGATES = (
+    ('gdp', 'gdp_pc_usd', 'median'),
+    ('life', 'life_expectancy_years', 'median'),
+    ('population', 'population_total', 'sum'),
+    ('income', 'ann_income_pc_growth_pct', 'mean'),
+)
+
+def calculate_snapshot_kpis(snapshot: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Calculate KPIs for the snapshot year with changes from the year before,
+    using the snapshot's <col>_prev columns instead of a second year slice.
+    Expects snapshot rows that all share the same year.
+    """
+    aggregates = {}
+    for key, col, how in SNAPSHOT_KPI_AGGREGATES:
+        current, previous = snapshot[col], snapshot[f'{col}_prev']
+        # Reduce floats in float64, like the groupby in calculate_kpis, so medians round the same
+        if current.dtype.kind == 'f':
+            current, previous = current.astype('float64'), previous.astype('float64')
+        aggregates[key] = (getattr(current, how)(), getattr(previous, how)())
+    
+    return kpis_from_aggregates(aggregates)
+
+@st.cache_data(max_entries=128, ttl="1h", show_spinner=False)
+def selection_kpis(_by_country_year: pd.DataFrame, _latest_by_country: pd.DataFrame,
+                   countries: Tuple[str, ...], current_year: int, previous_year: int,
+                   version: Tuple[Tuple[str, int], ...]) -> Dict[str, Any]:
+    """
+    KPIs for the selected countries (cached per selection).
+    
+    The frames are not hashed (leading underscore); the selection and the
+    data version from load_all_data make up the cache key.
+    
+    A comparison of the snapshot year against the year before comes straight
+    from the latest snapshot's prior-year columns; other year pairs are
+    aggregated from the matching rows of the (country, year)-indexed frame.
+    """
+    snapshot_rows = _latest_by_country.loc[_latest_by_country.index.intersection(countries)] if countries else _latest_by_country
+    if previous_year == current_year - 1 and (snapshot_rows['year'] == current_year).all():
+        return calculate_snapshot_kpis(snapshot_rows)
+    
+    year_values = _by_country_year.index.get_level_values(1).to_numpy()
+    mask = (year_values == current_year) | (year_values == previous_year)
+    if countries:
+        mask &= country_level_mask(_by_country_year.index, countries)
+    
+    return calculate_kpis(_by_country_year[mask].reset_index(), current_year, previous_year)
+
+def kpis_from_aggregates(aggregates: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Build the KPI dict from the (current, previous) gdp/life medians,
+    population sum and income mean, given as a two-row frame or a dict of pairs.
+    """
     kpis = {}
     
     # Median GDP per capita (across selected countries)
-    current_median_gdp = current_data['gdp_pc_usd'].median()
-    previous_median_gdp = previous_data['gdp_pc_usd'].median()
+    current_median_gdp, previous_median_gdp = aggregates['gdp']
     kpis['median_gdp'] = {
         'value': current_median_gdp,
         'change': ((current_median_gdp - previous_median_gdp) / previous_median_gdp * 100) if previous_median_gdp and previous_median_gdp != 0 else 0,
@@ -133,8 +450,7 @@ def calculate_kpis(df: pd.DataFrame, current_year: int, previous_year: int) -> D
     }
     
     # Median Life Expectancy (across selected countries)
-    current_median_life = current_data['life_expectancy_years'].median()
-    previous_median_life = previous_data['life_expectancy_years'].median()
+    current_median_life, previous_median_life = aggregates['life']
     kpis['median_life_expectancy'] = {
         'value': current_median_life,
         'change': current_median_life - previous_median_life if previous_median_life else 0,
@@ -143,8 +459,7 @@ def calculate_kpis(df: pd.DataFrame, current_year: int, previous_year: int) -> D
     }
     
     # Total Population (sum of selected countries)
-    current_total_pop = current_data['population_total'].sum()
-    previous_total_pop = previous_data['population_total'].sum()
+    current_total_pop, previous_total_pop = aggregates['population']
     kpis['total_population'] = {
         'value': current_total_pop,
         'change': ((current_total_pop - previous_total_pop) / previous_total_pop * 100) if previous_total_pop and previous_total_pop != 0 else 0,
@@ -153,8 +468,7 @@ def calculate_kpis(df: pd.DataFrame, current_year: int, previous_year: int) -> D
     }
     
     # Mean Income Growth (average across selected countries)
-    current_mean_income = current_data['ann_income_pc_growth_pct'].mean()
-    previous_mean_income = previous_data['ann_income_pc_growth_pct'].mean()
+    current_mean_income, previous_mean_income = aggregates['income']
     kpis['mean_income_growth'] = {
         'value': current_mean_income,
         'change': current_mean_income - previous_mean_income if previous_mean_income else 0,
@@ -164,19 +478,143 @@ def calculate_kpis(df: pd.DataFrame, current_year: int, previous_year: int) -> D
     
     return kpis
 
-def format_dataframe_numbers(df, columns):
+def lower_quartile(values: pd.Series) -> float:
     """
-    Format numbers in a DataFrame for better display.
+    25th percentile of a column, as describe() computes it.
     """
-    df_formatted = df.copy()
+    return values.quantile(0.25)
+
+def upper_quartile(values: pd.Series) -> float:
+    """
+    75th percentile of a column, as describe() computes it.
+    """
+    return values.quantile(0.75)
+
+# Reductions of summary_stats, with the row labels describe() gives them
+SUMMARY_STATISTICS = (
+    ('count', 'count'),
+    ('mean', 'mean'),
+    ('std', 'std'),
+    ('min', 'min'),
+    ('25%', lower_quartile),
+    ('50%', 'median'),
+    ('75%', upper_quartile),
+    ('max', 'max'),
+)
+
+@st.cache_data(max_entries=64, ttl="1h", show_spinner=False)
+def summary_stats(df: pd.DataFrame, columns: Tuple[str, ...] = INDICATOR_COLUMNS) -> pd.DataFrame:
+    """
+    Compute rounded summary statistics for the indicator columns (cached per data).
+    
+    One agg pass over the statistics the summary shows, laid out like describe().
+    """
+    stats = df[list(columns)].agg([how for _, how in SUMMARY_STATISTICS])
+    stats.index = pd.Index([label for label, _ in SUMMARY_STATISTICS])
+    return stats.astype('float64').round(2)
+
+def dataframe_to_table_rows(df: pd.DataFrame) -> List[List[str]]:
+    """
+    Convert a DataFrame to a header row plus stringified cell rows for ReportLab tables.
+    """
+    header = [str(col) for col in df.columns]
+    if df.empty:
+        return [header]
+    cells = np.column_stack([df[col].to_numpy().astype(str) for col in df.columns])
+    return [header] + cells.tolist()
+
+def dataframe_to_markdown(df: pd.DataFrame, index: bool = True) -> str:
+    """
+    Render a DataFrame as a Markdown pipe table without going through tabulate.
+    """
+    if index:
+        df = df.rename_axis('').reset_index()
+    rows = dataframe_to_table_rows(df)
+    lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + '|'.join(['---'] * len(rows[0])) + '|']
+    lines.extend('| ' + ' | '.join(row) + ' |' for row in rows[1:])
+    return '\n'.join(lines)
+
+def build_report(df: pd.DataFrame, countries: Tuple[str, ...], years: Tuple[int, int],
+                 include_summary: bool, include_raw: bool, title: str, generated_on: str,
+                 version: Optional[Tuple[Tuple[str, int], ...]] = None) -> str:
+    """
+    Build the Markdown body of the downloadable report.
+    
+    Expects the sorted (country, year)-indexed frame from load_all_data and
+    its data version. Only the header, which carries the title and the
+    generation time, is built per call; the sections are cached per selection.
+    """
+    record_count, sections = _report_sections(df, countries, years, include_summary, include_raw, version)
+    
+    header = f"""
+# {title}
+
+## Report Overview
+- Generated on: {generated_on}
+- Countries: {', '.join(countries)}
+- Time period: {years[0]} - {years[1]}
+- Total records: {record_count}
+
+## Summary Statistics
+"""
+    return header + sections
+
+@st.cache_data(max_entries=16, ttl="10m", show_spinner=False)
+def _report_sections(_df: pd.DataFrame, countries: Tuple[str, ...], years: Tuple[int, int],
+                     include_summary: bool, include_raw: bool,
+                     version: Optional[Tuple[Tuple[str, int], ...]]) -> Tuple[int, str]:
+    """
+    Record count and Markdown sections of the report for one selection.
+    
+    The frame is not hashed (leading underscore); the selection and the data
+    version make up the cache key.
+    """
+    filtered_data = filter_data(_df, countries, years, version)
+    
+    # Collect sections and join once at the end (linear in report size)
+    parts = []
+    
+    # Add summary statistics
+    if include_summary:
+        parts.append(f"\n{dataframe_to_markdown(summary_stats(filtered_data))}\n")
     
-    for col in columns:
-        if col in df_formatted.columns:
-            if col == 'gdp_pc_usd':
-                df_formatted[col] = df_formatted[col].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else "N/A")
-            elif col == 'population_total':
-                df_formatted[col] = df_formatted[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "N/A")
-            elif col in ['life_expectancy_years', 'ann_income_pc_growth_pct']:
-                df_formatted[col] = df_formatted[col].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "N/A")
+    # Add raw data preview
+    if include_raw:
+        parts.append("\n## Data Preview\n")
+        parts.append(f"\n{dataframe_to_markdown(filtered_data.head(10), index=False)}\n")
+    
+    return len(filtered_data), "".join(parts)
+
+@st.cache_data(max_entries=8, ttl="10m", show_spinner=False)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame to CSV bytes (cached per data).
+    """
+    return df.to_csv(index=False).encode()
+
+@st.cache_data(max_entries=8, ttl="10m", show_spinner=False)
+def to_json_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame to JSON records bytes (cached per data).
+    """
+    return df.to_json(orient="records", indent=2).encode()
+
+@st.cache_data(max_entries=8, ttl="10m", show_spinner=False)
+def to_xlsx_bytes(df: pd.DataFrame, sheet_name: str = 'WorldBank Data') -> bytes:
+    """
+    Serialize a DataFrame to Excel bytes (cached per data).
     
-    return df_formatted
\ No newline at end of file
+    Uses xlsxwriter when installed and falls back to openpyxl; raises
+    ImportError if neither is available.
+    """
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=8, ttl="10m", show_spinner=False)
+def to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame to Parquet bytes (cached per data, requires pyarrow).
+    """
+    return df.to_parquet(index=False)
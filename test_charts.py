@@ -0,0 +1,87 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from src.charts import lttb_indices, downsample_traces, create_gdp_bar_chart, create_population_bar_chart
+
+def reference_lttb(x, y, n_out):
+    """Point-by-point Largest-Triangle-Three-Buckets, as in the original write-up."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    selected = [0]
+    a = 0
+    for i in range(n_out - 2):
+        next_start = int(np.floor((i + 1) * every)) + 1
+        next_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        
+        best, best_area = None, -1.0
+        for j in range(int(np.floor(i * every)) + 1, int(np.floor((i + 1) * every)) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        selected.append(a)
+    selected.append(n - 1)
+    return np.array(selected)
+
+def test_lttb_indices_match_reference():
+    """lttb_indices picks the same points as the loop implementation."""
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        n = int(rng.integers(10, 3000))
+        n_out = int(rng.integers(3, n))
+        x = np.sort(rng.uniform(0, 100, n))
+        y = np.cumsum(rng.normal(size=n))
+        np.testing.assert_array_equal(lttb_indices(x, y, n_out), reference_lttb(x, y, n_out))
+
+def test_lttb_indices_properties():
+    """n_out increasing indices that keep both endpoints; short inputs are kept whole."""
+    rng = np.random.default_rng(1)
+    x = np.arange(5000, dtype=float)
+    y = rng.normal(size=5000)
+    
+    indices = lttb_indices(x, y, 1000)
+    assert len(indices) == 1000
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+    
+    np.testing.assert_array_equal(lttb_indices(x[:500], y[:500], 1000), np.arange(500))
+    np.testing.assert_array_equal(lttb_indices(x, y, 2), np.arange(5000))
+
+def test_downsample_traces_only_long_traces():
+    """Traces longer than n_out are downsampled; shorter ones are left as they are."""
+    rng = np.random.default_rng(2)
+    fig = go.Figure([
+        go.Scatter(x=np.arange(3000), y=rng.normal(size=3000)),
+        go.Scatter(x=np.arange(50), y=rng.normal(size=50)),
+    ])
+    long_y = np.asarray(fig.data[0].y)
+    
+    downsample_traces(fig, n_out=200)
+    
+    assert len(fig.data[0].x) == 200
+    np.testing.assert_array_equal(fig.data[0].y, long_y[np.asarray(fig.data[0].x)])
+    assert len(fig.data[1].x) == 50
+
+def test_bar_charts_show_colour_scale():
+    """The ranking bar charts keep the colour bar px.bar(color=...) used to draw."""
+    snapshot = pd.DataFrame({
+        'country': ['Brazil', 'Chile', 'India'],
+        'year': [2024, 2024, 2024],
+        'gdp_pc_usd': [10_000.0, 15_000.0, 2_500.0],
+        'population_total': [211_000_000, 19_600_000, 1_430_000_000],
+        'gdp_rank': [2, 1, 3],
+        'population_rank': [2, 3, 1],
+    })
+    countries = ('Brazil', 'Chile', 'India')
+    
+    for fig in (create_gdp_bar_chart(snapshot, countries), create_population_bar_chart(snapshot, countries)):
+        assert fig.data[0].marker.showscale
+        assert fig.data[0].marker.colorbar.title.text
@@ -2,9 +2,16 @@ import sys
 import os
 sys.path.append('src')
 
+import numpy as np
 import pandas as pd
+import pytest
+import data_loader
 from data_loader import (load_and_transform_data, get_missing_data_stats, 
-                        validate_data, save_cleaned_data)
+                        validate_data, save_cleaned_data, read_year_columns,
+                        read_indicator_table, read_indicator_table_polars,
+                        interpolate_within_groups, INDICATOR_MAPPING)
+
+RAW_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', 'path.csv')
 
 def test_data_cleaning():
     try:
@@ -48,5 +55,66 @@ def test_data_cleaning():
         traceback.print_exc()
         return False
 
+def indicator_values(df):
+    """Non-missing (country, code, year, series, value) rows of an indicator table, sorted."""
+    long = df.melt(id_vars=['Country Name', 'Country Code', 'year'], var_name='series', value_name='value')
+    return long.dropna(subset=['value']).sort_values(['Country Name', 'series', 'year']).reset_index(drop=True)
+
+def test_read_indicator_table_matches_melt_pivot(monkeypatch):
+    """The pandas reader gives the values of a plain melt of the raw CSV."""
+    monkeypatch.setattr(data_loader, 'pl', None)
+    year_columns = read_year_columns(RAW_DATA_PATH)
+    result = read_indicator_table(RAW_DATA_PATH, INDICATOR_MAPPING.keys())
+    
+    raw = pd.read_csv(RAW_DATA_PATH, na_values=['..', '', 'NA'])
+    raw = raw[raw['Country Name'].notna() & raw['Series Code'].isin(list(INDICATOR_MAPPING))]
+    raw = raw.drop_duplicates(['Country Name', 'Country Code', 'Series Code'], keep='first')
+    expected = raw.melt(id_vars=['Country Name', 'Country Code', 'Series Code'], value_vars=list(year_columns),
+                        var_name='year_label', value_name='value').dropna(subset=['value'])
+    expected = pd.DataFrame({
+        'Country Name': expected['Country Name'],
+        'Country Code': expected['Country Code'],
+        'year': expected['year_label'].map(year_columns).astype('int64'),
+        'series': expected['Series Code'],
+        'value': expected['value'].astype(float),
+    }).sort_values(['Country Name', 'series', 'year']).reset_index(drop=True)
+    
+    assert not expected.empty
+    assert sorted(result.columns[3:]) == sorted(INDICATOR_MAPPING)
+    assert not result.duplicated(['Country Name', 'Country Code', 'year']).any()
+    pd.testing.assert_frame_equal(indicator_values(result), expected, check_dtype=False)
+
+def test_read_indicator_table_polars_matches_pandas(monkeypatch):
+    """The polars reader gives the same table as the pandas one."""
+    pytest.importorskip('polars')
+    polars_result = read_indicator_table_polars(RAW_DATA_PATH, read_year_columns(RAW_DATA_PATH), INDICATOR_MAPPING.keys())
+    monkeypatch.setattr(data_loader, 'pl', None)
+    pandas_result = read_indicator_table(RAW_DATA_PATH, INDICATOR_MAPPING.keys())
+    
+    assert list(polars_result.columns) == list(pandas_result.columns)
+    keys = ['Country Name', 'Country Code', 'year']
+    pd.testing.assert_frame_equal(
+        polars_result.sort_values(keys).reset_index(drop=True),
+        pandas_result.sort_values(keys).reset_index(drop=True),
+        check_dtype=False, check_column_type=False, check_names=False
+    )
+
+@pytest.mark.parametrize('limit_direction', ['forward', 'both'])
+def test_interpolate_within_groups_matches_groupby_interpolate(limit_direction):
+    """interpolate_within_groups matches a per-group interpolate on random gappy frames."""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        sizes = rng.integers(1, 12, size=rng.integers(1, 8))
+        groups = np.repeat([f'g{i}' for i in range(len(sizes))], sizes)
+        values = rng.normal(size=(len(groups), 2))
+        values[rng.random(values.shape) < 0.4] = np.nan
+        df = pd.DataFrame({'country': groups, 'a': values[:, 0], 'b': values[:, 1]})
+        
+        expected = df.groupby('country', sort=False)[['a', 'b']].transform(
+            lambda x: x.interpolate(limit_direction=limit_direction)
+        )
+        result = interpolate_within_groups(df, ['a', 'b'], 'country', limit_direction=limit_direction)
+        pd.testing.assert_frame_equal(result, expected)
+
 if __name__ == "__main__":
     test_data_cleaning()
\ No newline at end of file
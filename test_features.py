@@ -2,9 +2,10 @@ import sys
 import os
 sys.path.append('src')
 
+import numpy as np
 import pandas as pd
 from data_loader import load_and_transform_data
-from features import engineer_features, save_features
+from features import engineer_features, save_features, create_latest_year_snapshot, SNAPSHOT_PREVIOUS_YEAR_COLUMNS
 
 def test_feature_engineering():
     try:
@@ -47,5 +48,29 @@ def test_feature_engineering():
         traceback.print_exc()
         return False
 
+def test_latest_year_snapshot_previous_year_columns():
+    """Each <col>_prev holds the country's value in the year before its latest year, or NaN."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(30):
+        # Random years with gaps, so some countries have no row for the year before
+        for year in sorted(rng.choice(np.arange(2010, 2025), size=rng.integers(1, 10), replace=False)):
+            rows.append({'country': f'Country {i}', 'year': int(year),
+                         **{col: rng.normal() for col in SNAPSHOT_PREVIOUS_YEAR_COLUMNS}})
+    df = pd.DataFrame(rows).sample(frac=1, random_state=0).reset_index(drop=True)
+    
+    snapshot = create_latest_year_snapshot(df)
+    
+    assert len(snapshot) == df['country'].nunique()
+    for _, row in snapshot.iterrows():
+        country_rows = df[df['country'] == row['country']]
+        assert row['year'] == country_rows['year'].max()
+        previous = country_rows[country_rows['year'] == row['year'] - 1]
+        for col in SNAPSHOT_PREVIOUS_YEAR_COLUMNS:
+            if previous.empty:
+                assert np.isnan(row[f'{col}_prev'])
+            else:
+                assert row[f'{col}_prev'] == previous[col].iloc[0]
+
 if __name__ == "__main__":
     test_feature_engineering()
\ No newline at end of file
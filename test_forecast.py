@@ -0,0 +1,53 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from src.forecast import fit_linear_trends, batch_linear_fit
+
+def random_by_country(rng, n_countries=40):
+    """{country: {indicator: year-indexed Series}} with gaps, like load_all_data builds."""
+    by_country = {}
+    for i in range(n_countries):
+        years = np.arange(2000, 2000 + rng.integers(1, 25))
+        values = rng.normal(100, 20, size=len(years)) + rng.normal() * (years - 2000)
+        values[rng.random(len(years)) < 0.3] = np.nan
+        by_country[f'Country {i}'] = {'gdp_pc_usd': pd.Series(values, index=years)}
+    return by_country
+
+def test_fit_linear_trends_matches_polyfit():
+    """Each country's slope and intercept match np.polyfit on its non-missing values."""
+    rng = np.random.default_rng(0)
+    by_country = random_by_country(rng)
+    
+    trends = fit_linear_trends(by_country, 'gdp_pc_usd', min_data_points=5)
+    
+    expected_countries = [country for country, series in by_country.items()
+                          if series['gdp_pc_usd'].notna().sum() >= 5]
+    assert list(trends.index) == expected_countries
+    for country in expected_countries:
+        ts = by_country[country]['gdp_pc_usd'].dropna()
+        slope, intercept = np.polyfit(ts.index.values.astype(float), ts.values, 1)
+        assert np.isclose(trends.loc[country, 'slope'], slope, rtol=1e-6, atol=1e-9)
+        assert np.isclose(trends.loc[country, 'intercept'], intercept, rtol=1e-6, atol=1e-6)
+
+def test_fit_linear_trends_without_series():
+    """An indicator no country has enough data for gives an empty frame."""
+    rng = np.random.default_rng(1)
+    trends = fit_linear_trends(random_by_country(rng), 'life_expectancy_years')
+    assert trends.empty
+    assert list(trends.columns) == ['slope', 'intercept']
+
+def test_batch_linear_fit_exact_lines():
+    """Points on a line give back that line's slope and intercept."""
+    x = np.array([0.0, 1.0, 2.0, 2000.0, 2001.0, 2002.0, 2003.0])
+    y = np.concatenate([1.0 + 2.0 * x[:3], -5.0 - 0.5 * x[3:]])
+    offsets = np.array([0, 3, 7], dtype=np.int64)
+    
+    slopes, intercepts = batch_linear_fit(offsets, x, y)
+    
+    np.testing.assert_allclose(slopes, [2.0, -0.5])
+    np.testing.assert_allclose(intercepts, [1.0, -5.0], atol=1e-8)
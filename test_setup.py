@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import streamlit as st
-from sklearn.linear_model import LinearRegression
 import statsmodels.api as sm
 import pycountry
 
@@ -0,0 +1,141 @@
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils import (load_all_data, filter_data, country_level_mask, calculate_kpis, calculate_snapshot_kpis,
+                       selection_kpis, kpis_from_aggregates, format_number, format_number_values,
+                       summary_stats, INDICATOR_COLUMNS)
+
+FEATURES_DIR = os.path.join(ROOT, 'Data', 'processed', 'features')
+
+@pytest.fixture(scope='module')
+def data():
+    return load_all_data(FEATURES_DIR)
+
+def assert_kpis_match(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key in expected:
+        for field in ('value', 'change'):
+            a, b = expected[key][field], actual[key][field]
+            assert (pd.isna(a) and pd.isna(b)) or math.isclose(a, b, rel_tol=1e-4, abs_tol=1e-4), (key, field, a, b)
+        assert expected[key]['formatted_value'] == actual[key]['formatted_value']
+        assert expected[key]['formatted_change'] == actual[key]['formatted_change']
+
+def test_snapshot_kpis_match_year_slice(data):
+    """The snapshot's _prev columns give the same KPIs as slicing the two years from the main data."""
+    by_country_year = data['main_by_country_year']
+    latest_by_country = data['latest_by_country']
+    snapshot_year = int(latest_by_country['year'].max())
+    countries = data['available_countries']
+    
+    rng = random.Random(0)
+    selections = [()] + [tuple(sorted(rng.sample(countries, rng.randint(1, len(countries))))) for _ in range(200)]
+    for selection in selections:
+        rows = latest_by_country.loc[latest_by_country.index.intersection(selection)] if selection else latest_by_country
+        expected = calculate_kpis(filter_data(by_country_year, selection, (snapshot_year - 1, snapshot_year),
+                                              data['version']),
+                                  snapshot_year, snapshot_year - 1)
+        assert_kpis_match(expected, calculate_snapshot_kpis(rows))
+
+def test_selection_kpis_match_calculate_kpis(data):
+    """selection_kpis agrees with calculate_kpis on the filtered range for any year pair."""
+    by_country_year = data['main_by_country_year']
+    years = data['available_years']
+    countries = data['available_countries'] + ['Atlantis']
+    
+    rng = random.Random(1)
+    for _ in range(200):
+        selection = tuple(sorted(rng.sample(countries, rng.randint(0, len(countries)))))
+        current_year = rng.choice(years)
+        previous_year = current_year - rng.choice([0, 1])
+        expected = calculate_kpis(filter_data(by_country_year, selection, (previous_year, current_year),
+                                              data['version']),
+                                  current_year, previous_year)
+        actual = selection_kpis(by_country_year, data['latest_by_country'], selection, current_year, previous_year,
+                                data['version'])
+        assert_kpis_match(expected, actual)
+
+def test_filter_data_matches_label_selection(data):
+    """filter_data keeps the same rows as selecting countries and years by label."""
+    by_country_year = data['main_by_country_year']
+    years = data['available_years']
+    countries = data['available_countries'] + ['Atlantis']
+    
+    rng = random.Random(2)
+    for _ in range(100):
+        selection = tuple(sorted(rng.sample(countries, rng.randint(0, len(countries)))))
+        first_year, last_year = sorted(rng.choices(range(years[0] - 2, years[-1] + 3), k=2))
+        
+        flat = by_country_year.reset_index()
+        keep = flat['year'].between(first_year, last_year)
+        if selection:
+            keep &= flat['country'].isin(selection)
+        expected = flat[keep].reset_index(drop=True)
+        
+        result = filter_data(by_country_year, selection, (first_year, last_year), data['version'])
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+
+def test_country_level_mask_matches_isin():
+    """The code-based mask agrees with isin on the level labels, including unknown countries."""
+    index = pd.MultiIndex.from_product([['Brazil', 'Chile', 'India', 'Japan'], [2020, 2021, 2022]],
+                                       names=['country', 'year'])
+    for countries in [(), ('Chile',), ('India', 'Brazil'), ('Japan', 'Atlantis'), ('Atlantis',)]:
+        expected = index.get_level_values('country').isin(countries)
+        np.testing.assert_array_equal(country_level_mask(index, countries), expected)
+
+def test_format_number_values_matches_format_number():
+    """The vectorized formatter gives the scalar format_number string for every value."""
+    rng = np.random.default_rng(3)
+    values = np.concatenate([
+        rng.normal(size=200) * 10.0 ** rng.integers(0, 12, size=200),
+        [0.0, 999.0, 1_000.0, 999_999.0, 1_000_000.0, 1e9, -1e9, -1_500.0, np.nan],
+    ])
+    for precision in (0, 1, 2):
+        expected = [format_number(v, precision) for v in values]
+        assert list(format_number_values(values, precision)) == expected
+
+def test_calculate_kpis_matches_year_slices(data):
+    """calculate_kpis gives the KPIs of the two year slices reduced one by one."""
+    by_country_year = data['main_by_country_year']
+    years = data['available_years']
+    countries = data['available_countries']
+    
+    rng = random.Random(4)
+    for _ in range(100):
+        selection = tuple(sorted(rng.sample(countries, rng.randint(1, len(countries)))))
+        current_year = rng.choice(years + [years[-1] + 1])
+        previous_year = current_year - rng.choice([1, 2, 5])
+        df = filter_data(by_country_year, selection, (years[0], years[-1]), data['version'])
+        
+        current, previous = df[df['year'] == current_year], df[df['year'] == previous_year]
+        expected = kpis_from_aggregates({
+            'gdp': (current['gdp_pc_usd'].astype('float64').median(), previous['gdp_pc_usd'].astype('float64').median()),
+            'life': (current['life_expectancy_years'].astype('float64').median(),
+                     previous['life_expectancy_years'].astype('float64').median()),
+            'population': (current['population_total'].sum(), previous['population_total'].sum()),
+            'income': (current['ann_income_pc_growth_pct'].astype('float64').mean(),
+                       previous['ann_income_pc_growth_pct'].astype('float64').mean()),
+        })
+        assert_kpis_match(expected, calculate_kpis(df, current_year, previous_year))
+
+def test_summary_stats_matches_describe(data):
+    """The single agg pass gives the same table as describe(), including for empty selections."""
+    by_country_year = data['main_by_country_year']
+    years = data['available_years']
+    countries = data['available_countries']
+    
+    rng = random.Random(5)
+    for _ in range(50):
+        selection = tuple(sorted(rng.sample(countries, rng.randint(0, len(countries)))))
+        first_year = rng.randint(years[0], years[-1] + 2)
+        df = filter_data(by_country_year, selection, (first_year, rng.randint(first_year, years[-1] + 3)), data['version'])
+        
+        expected = df[list(INDICATOR_COLUMNS)].describe().round(2)
+        pd.testing.assert_frame_equal(summary_stats(df), expected, check_index_type=False)